@@ -0,0 +1,44 @@
+# pylint: disable=C0413
+"""
+Compare a typed settings read with load_env and with re-reading .env per call.
+
+    python benchmarks/bench_env_load.py [ROUNDS]
+"""
+import os
+import sys
+import time
+
+import dotenv
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from utils.env_load_util import EnvLoadUtil
+
+
+def _dotenv_per_read():
+    # The previous path: every read re-parsed .env and converted the string
+    dotenv.load_dotenv()
+    return float(os.getenv("KMB_ETA_CACHE_TTL", "30"))
+
+
+def _load_env():
+    return float(EnvLoadUtil.load_env("KMB_ETA_CACHE_TTL", "30"))
+
+
+def _settings():
+    return EnvLoadUtil.settings().kmb_eta_cache_ttl
+
+
+def main(rounds: int = 20000):
+    assert _dotenv_per_read() == _load_env() == _settings()
+    for name, read in (("dotenv", _dotenv_per_read), ("load_env", _load_env), ("settings", _settings)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            read()
+        print(f"{name:8s} {(time.perf_counter() - start) / rounds * 1e9:10.1f} ns/read")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,41 @@
+# pylint: disable=C0413
+"""
+Compare the pydantic and fast ETA decoders on recorded payloads, the bundled fixtures by default.
+
+    python benchmarks/bench_eta_decode.py [stop_eta.json ...] [--route 1A]
+"""
+import os
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from utils.eta_decode_util import EtaDecodeUtil
+
+FIXTURE_DIR = os.path.join(REPO_DIR, "tests", "fixtures")
+DEFAULT_PAYLOADS = [os.path.join(FIXTURE_DIR, "kmb_stop_eta.json"), os.path.join(FIXTURE_DIR, "kmb_route_eta.json")]
+
+
+def main(paths: list[str], route: str = None, rounds: int = 200):
+    for path in paths:
+        with open(path, "rb") as f:
+            content = f.read()
+        for name, decode in (("pydantic", EtaDecodeUtil.decode_validated), ("fast", EtaDecodeUtil.decode)):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                feed = decode(content, route)
+            elapsed = (time.perf_counter() - start) / rounds
+            print(f"{os.path.basename(path)}: {name:8s} {elapsed * 1e6:9.1f} us/payload, {len(feed.data)} rows")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    route_arg = None
+    if "--route" in args:
+        index = args.index("--route")
+        route_arg = args[index + 1]
+        del args[index:index + 2]
+    main(args or DEFAULT_PAYLOADS, route_arg)
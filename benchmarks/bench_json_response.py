@@ -0,0 +1,56 @@
+# pylint: disable=C0413
+"""
+Compare the old and new ETA response encoding on real stop metadata.
+
+    python benchmarks/bench_json_response.py [res/stop_data.json]
+"""
+import os
+import sys
+import json
+import time
+from types import SimpleNamespace
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(REPO_DIR, "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from utils.lang_view_util import LangViewUtil
+
+
+def main(stop_file: str, stops_per_response: int = 10, etas_per_stop: int = 6, rounds: int = 2000):
+    with open(stop_file, "rb") as f:
+        stops = [SimpleNamespace(**row) for row in json.loads(f.read())["data"]][:stops_per_response]
+    eta_data = [
+        {"route": "1A", "destination_en": "STAR FERRY", "destination_tc": "尖沙咀碼頭", "destination_sc": "尖沙咀码头",
+         "eta": "2026-02-16T22:10:00+08:00", "eta_seq": i, "direction": "O", "service_type": 1,
+         "remarks_en": "", "remarks_tc": "", "remarks_sc": ""}
+        for i in range(1, etas_per_stop + 1)
+    ]
+
+    def _stdlib():
+        # The previous path: jsonable_encoder over the dicts, then json.dumps in JSONResponse
+        return json.dumps(jsonable_encoder({"stops_with_eta": [
+            {**LangViewUtil.stop_info_fields(stop), "eta_data": eta_data} for stop in stops
+        ]}), ensure_ascii=False).encode("utf-8")
+
+    def _orjson():
+        # Returning FastJSONResponse directly: no jsonable_encoder, orjson render
+        return orjson.dumps({"stops_with_eta": [
+            {**LangViewUtil.stop_info_fields(stop), "eta_data": eta_data} for stop in stops
+        ]})
+
+    assert orjson.loads(_stdlib()) == orjson.loads(_orjson())
+    for name, encode in (("stdlib", _stdlib), ("orjson", _orjson)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            encode()
+        print(f"{name:8s} {(time.perf_counter() - start) / rounds * 1e6:8.1f} us/response "
+              f"({stops_per_response} stops x {etas_per_stop} ETAs)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(REPO_DIR, "res", "stop_data.json"))
@@ -0,0 +1,130 @@
+# pylint: disable=C0413,W0212
+"""
+Compare the metric KDTree with a brute-force haversine scan and with the previous
+square query on raw degrees, over the stop catalog.
+
+    python benchmarks/bench_stop_index.py [res/stop_data.json]
+"""
+import os
+import sys
+import json
+import time
+
+import numpy as np
+from scipy.spatial import KDTree
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(0, SRC_DIR)
+
+from utils.env_load_util import EnvLoadUtil
+from utils.stop_index_util import EARTH_RADIUS_METERS, StopIndex
+
+
+def _haversine_m(lats: np.ndarray, lons: np.ndarray, lat: float, lon: float) -> np.ndarray:
+    lat1, lon1, lat2, lon2 = np.radians(lats), np.radians(lons), np.radians(lat), np.radians(lon)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(a))
+
+
+def main(path: str, queries: int = 2000, radius_m: float = 300, k: int = 10, legacy_distance: float = 0.003):
+    with open(path, "r", encoding="utf-8") as f:
+        stops = json.load(f)["data"]
+    lats = np.array([float(stop["lat"]) for stop in stops])
+    lons = np.array([float(stop["long"]) for stop in stops])
+
+    start = time.perf_counter()
+    index = StopIndex(lats, lons)
+    print(f"{len(index)} stops, KDTree built in {(time.perf_counter() - start) * 1e3:.1f} ms")
+
+    # Query points scattered up to ~500 m around randomly chosen stops
+    rng = np.random.default_rng(0)
+    picks = rng.integers(0, len(index), queries)
+    query_lats = lats[picks] + rng.uniform(-0.0045, 0.0045, queries)
+    query_lons = lons[picks] + rng.uniform(-0.0045, 0.0045, queries)
+
+    start = time.perf_counter()
+    brute_radius = []
+    for lat, lon in zip(query_lats, query_lons):
+        distances = _haversine_m(lats, lons, lat, lon)
+        found = np.flatnonzero(distances <= radius_m)
+        brute_radius.append(found[np.argsort(distances[found])])
+    brute_radius_s = time.perf_counter() - start
+
+    # The previous index: a KDTree on raw (lat, long) degrees queried with a ±KMB_NEAR_STOP_DISTANCE square
+    degree_tree = KDTree(np.column_stack((lats, lons)))
+    start = time.perf_counter()
+    legacy_radius = [
+        np.asarray(degree_tree.query_ball_point([lat, lon], r=legacy_distance, p=np.inf), dtype=np.intp)
+        for lat, lon in zip(query_lats, query_lons)
+    ]
+    legacy_radius_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tree_radius = [index.query_radius(lat, lon, radius_m)[0] for lat, lon in zip(query_lats, query_lons)]
+    tree_radius_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tree_radius_batch = index.query_radius_batch(query_lats, query_lons, radius_m)
+    tree_radius_batch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    brute_knn = [np.argsort(_haversine_m(lats, lons, lat, lon))[:k] for lat, lon in zip(query_lats, query_lons)]
+    brute_knn_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tree_knn = [index.query_knn(lat, lon, k)[0] for lat, lon in zip(query_lats, query_lons)]
+    tree_knn_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    index.query_knn_batch(query_lats, query_lons, k)
+    tree_knn_batch_s = time.perf_counter() - start
+
+    # Many stops share a pole, so knn ties may pick different ids, and the projection moves the
+    # radius edge by well under 1 m: compare distances and allow differences only at the edge
+    radius_agree = knn_agree = 0
+    for lat, lon, brute, tree in zip(query_lats, query_lons, brute_radius, tree_radius):
+        differing = np.fromiter(set(brute.tolist()) ^ set(tree.tolist()), dtype=np.intp)
+        radius_agree += bool(np.all(np.abs(_haversine_m(lats[differing], lons[differing], lat, lon) - radius_m) < 1))
+    for lat, lon, brute, tree in zip(query_lats, query_lons, brute_knn, tree_knn):
+        knn_agree += bool(np.allclose(_haversine_m(lats[brute], lons[brute], lat, lon),
+                                      _haversine_m(lats[tree], lons[tree], lat, lon), atol=1))
+    batch_agree = all(np.array_equal(a, b[0]) for a, b in zip(tree_radius, tree_radius_batch))
+    hits = sum(len(found) for found in brute_radius) / queries
+
+    def line(name: str, seconds: float):
+        print(f"  {name:32s} {seconds / queries * 1e6:9.1f} us/query")
+
+    print(f"{queries} queries, radius {radius_m:g} m ({hits:.1f} stops/query on average), k={k}")
+    line("radius brute force haversine", brute_radius_s)
+    line(f"square KDTree on degrees ±{legacy_distance:g}", legacy_radius_s)
+    line("radius KDTree", tree_radius_s)
+    line("radius KDTree batch", tree_radius_batch_s)
+    line("knn brute force haversine", brute_knn_s)
+    line("knn KDTree", tree_knn_s)
+    line("knn KDTree batch", tree_knn_batch_s)
+    print(f"  agrees with brute force: radius {radius_agree}/{queries}, knn {knn_agree}/{queries}, "
+          f"batch matches single: {batch_agree}")
+
+    # How the old square's result sets differ from the metric circle
+    legacy_sizes = np.array([len(found) for found in legacy_radius])
+    circle_sizes = np.array([len(found) for found in tree_radius])
+    extra = np.array([len(set(old.tolist()) - set(new.tolist())) for old, new in zip(legacy_radius, tree_radius)])
+    missing = np.array([len(set(new.tolist()) - set(old.tolist())) for old, new in zip(legacy_radius, tree_radius)])
+    north_m = np.radians(legacy_distance) * EARTH_RADIUS_METERS
+    east_m = north_m * index._cos_origin
+    square_km2 = 4 * north_m * east_m / 1e6
+    circle_km2 = np.pi * radius_m ** 2 / 1e6
+    print(f"±{legacy_distance:g} degree square vs {radius_m:g} m circle:")
+    print(f"  area {square_km2:.3f} km² ({2 * east_m:.0f} m x {2 * north_m:.0f} m) vs {circle_km2:.3f} km² "
+          f"({(1 - circle_km2 / square_km2) * 100:.0f}% smaller)")
+    print(f"  stops/query {legacy_sizes.mean():.1f} vs {circle_sizes.mean():.1f}, "
+          f"only in square {extra.mean():.1f}/query, only in circle {missing.mean():.2f}/query")
+    print(f"  identical sets {int(np.sum((extra == 0) & (missing == 0)))}/{queries}, "
+          f"queries losing at least one stop {int(np.sum(extra > 0))}/{queries}, "
+          f"queries losing every stop {int(np.sum((legacy_sizes > 0) & (circle_sizes == 0)))}/{queries}")
+
+
+if __name__ == "__main__":
+    settings = EnvLoadUtil.settings()
+    main(sys.argv[1] if len(sys.argv) > 1 else os.path.join(settings.base_folder, "res", settings.kmb_stop_data))
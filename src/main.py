@@ -1,10 +1,19 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 import uvicorn
 
 from routes import app_router
+from routes.metrics_router import router as metrics_router
 from utils.env_load_util import EnvLoadUtil
+from utils.httpx_util import get_global_httpx_util
+from utils.geocode_cache_util import get_global_geocode_cache
+from utils.geocoder_util import get_global_async_geocoder
+from utils.kmb_util import get_global_kmb_util
+from utils.eta_subscription_util import get_global_eta_subscription_hub
+from utils.json_response_util import FastJSONResponse
 
 # Configure logging
 logging.basicConfig(
@@ -15,9 +24,34 @@ logging.basicConfig(
     ],
 )
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    EnvLoadUtil.install_reload_signal_handler()
+    httpx_util = get_global_httpx_util()
+    await httpx_util.open()
+    geocode_cache = get_global_geocode_cache()
+    geocode_cache.warm()
+    kmb_util = get_global_kmb_util()
+    await kmb_util.warm_up()
+    catalog_refresher = asyncio.create_task(
+        kmb_util.run_catalog_refresher(EnvLoadUtil.settings().kmb_catalog_refresh_interval)
+    )
+    try:
+        yield
+    finally:
+        catalog_refresher.cancel()
+        await kmb_util.close()
+        await get_global_eta_subscription_hub().close()
+        await httpx_util.close()
+        get_global_async_geocoder().close()
+        geocode_cache.close()
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
 app.include_router(app_router, prefix="/router", tags=["kmb_router"])
+app.include_router(metrics_router)
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host=EnvLoadUtil.load_env("APPLICATION_SERVER_HOST", "127.0.0.1"), 
-                port=int(EnvLoadUtil.load_env("APPLICATION_SERVER_PORT", 8000)), reload=True)
+    uvicorn.run("main:app", host=EnvLoadUtil.settings().application_server_host, 
+                port=EnvLoadUtil.settings().application_server_port, reload=True)
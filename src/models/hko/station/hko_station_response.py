@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class WeatherStation(BaseModel):
+    name_en: str
+    name_tc: str
+    name_sc: str
+    lat: str
+    long: str
+
+
+class WeatherStationListResponse(BaseModel):
+    type: str
+    version: str
+    generated_timestamp: str
+    data: List[WeatherStation]
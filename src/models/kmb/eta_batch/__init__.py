@@ -0,0 +1,3 @@
+from .eta_batch_request import ETABatchQuery, ETABatchRequest
+
+__all__ = ["ETABatchQuery", "ETABatchRequest"]
@@ -0,0 +1,12 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+
+class ETABatchQuery(BaseModel):
+    address: str
+    route: Optional[str] = None
+
+
+class ETABatchRequest(BaseModel):
+    queries: List[ETABatchQuery] = Field(min_length=1, max_length=50)
+    lang: Optional[str] = None
@@ -0,0 +1,3 @@
+from .eta_subscription_message import EtaSubscriptionMessage
+
+__all__ = ["EtaSubscriptionMessage"]
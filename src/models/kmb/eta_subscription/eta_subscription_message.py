@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+
+
+class EtaSubscriptionMessage(BaseModel):
+    action: Literal["subscribe", "unsubscribe"]
+    stop_id: str = Field(min_length=1, max_length=64)
+    route: Optional[str] = Field(default=None, min_length=1, max_length=16)
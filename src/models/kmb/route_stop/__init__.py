@@ -0,0 +1,3 @@
+from .route_stop_response import RouteStop, RouteStopListResponse
+
+__all__ = ["RouteStop", "RouteStopListResponse"]
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class RouteStop(BaseModel):
+    route: str
+    bound: str
+    service_type: str
+    seq: str
+    stop: str
+
+
+class RouteStopListResponse(BaseModel):
+    type: str
+    version: str
+    generated_timestamp: str
+    data: List[RouteStop]
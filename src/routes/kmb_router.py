@@ -1,63 +1,49 @@
 # pylint: disable=W0613,W1203,E1136,W0718
+import asyncio
 import logging
+from typing import AsyncIterator
 
-from fastapi import APIRouter
+import orjson
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from utils import kmb_util
-from utils.env_load_util import EnvLoadUtil
+from utils.lang_view_util import LangViewUtil
+from utils.json_response_util import FastJSONResponse
+from utils.catalog_response_util import get_global_catalog_response_cache
+from utils.eta_subscription_util import EtaSubscriber, get_global_eta_subscription_hub
+from models.kmb.eta_batch.eta_batch_request import ETABatchQuery, ETABatchRequest
+from models.kmb.eta_subscription.eta_subscription_message import EtaSubscriptionMessage
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/kmb_router", tags=["kmb_router"])
 
 
-def _build_stop_info(stop, eta_response, route_filter: str = None) -> dict:
-    """Build a stop info dict with ETA data, optionally filtered by route number."""
-    stop_info = {
-        "stop_id": stop.stop,
-        "stop_name_en": stop.name_en,
-        "stop_name_tc": stop.name_tc,
-        "stop_name_sc": stop.name_sc,
-        "latitude": stop.lat,
-        "longitude": stop.long,
-        "eta_data": [],
-    }
+def _build_stop_info(stop, eta_response, route_filter: str = None, lang: str = None) -> dict:
+    """Build a stop info dict with ETA data, optionally filtered by route number and projected to one language."""
+    stop_info = {**LangViewUtil.stop_info_fields(stop, lang), "eta_data": []}
     if eta_response and eta_response.data:
         for eta in eta_response.data:
             if route_filter is None or eta.route == route_filter:
-                stop_info["eta_data"].append({
-                    "route": eta.route,
-                    "destination_en": eta.dest_en,
-                    "destination_tc": eta.dest_tc,
-                    "destination_sc": eta.dest_sc,
-                    "eta": eta.eta,
-                    "eta_seq": eta.eta_seq,
-                    "direction": eta.dir,
-                    "service_type": eta.service_type,
-                    "remarks_en": eta.rmk_en,
-                    "remarks_tc": eta.rmk_tc,
-                    "remarks_sc": eta.rmk_sc,
-                })
+                stop_info["eta_data"].append(kmb_util.KMBRouterUtil.format_eta_entry(eta, lang))
         logger.info(f"Stop {stop.stop}: Found {len(stop_info['eta_data'])} ETA entries")
     else:
         logger.info(f"Stop {stop.stop}: No ETA data available")
     return stop_info
 
 
-async def _eta_workflow(address: str, route_filter: str = None) -> dict:
-    """Shared ETA workflow: geocode address -> nearby stops -> ETAs."""
-    lat_lon = await kmb_util.KMBRouterUtil.get_lat_lon_from_address(address)
-    if "error" in lat_lon:
-        logger.error(f"Geocoding failed for address: {address}")
-        return {
-            "error": "Address not found",
-            "address": address,
-            "details": "Could not geocode the provided address. Please check the address and try again.",
-        }
+def _geocode_failed_result(address: str) -> dict:
+    return {
+        "error": "Address not found",
+        "address": address,
+        "details": "Could not geocode the provided address. Please check the address and try again.",
+    }
 
-    latitude, longitude = lat_lon["latitude"], lat_lon["longitude"]
-    logger.info(f"Geocoded to: lat={latitude}, lon={longitude}")
 
-    nearby_stops = await kmb_util.KMBRouterUtil.load_near_stop_with_lat_lon(str(latitude), str(longitude))
+def _eta_result(address: str, latitude: float, longitude: float, nearby_stops: list, eta_responses: list,
+                route_filter: str = None, lang: str = None) -> dict:
+    """Assemble the ETA workflow response from nearby stops and their ETA results, in the same order."""
     if not nearby_stops:
         logger.warning(f"No nearby stops found for lat={latitude}, lon={longitude}")
         return {
@@ -69,18 +55,16 @@ async def _eta_workflow(address: str, route_filter: str = None) -> dict:
             "message": "No bus stops found nearby. Try a different address or increase search radius.",
         }
 
-    logger.info(f"Found {len(nearby_stops)} nearby stops. Fetching ETAs...")
     stops_with_eta = []
-    for stop in nearby_stops:
-        try:
-            eta_response = await kmb_util.KMBRouterUtil.fetch_kmb_eta_stop_by_stop_id(stop.stop)
-            stops_with_eta.append(_build_stop_info(stop, eta_response, route_filter))
-        except Exception as eta_error:
-            logger.error(f"Failed to fetch ETA for stop {stop.stop}: {str(eta_error)}")
+    for stop, eta_response in zip(nearby_stops, eta_responses):
+        if isinstance(eta_response, Exception):
+            logger.error(f"Failed to fetch ETA for stop {stop.stop}: {str(eta_response)}")
             stops_with_eta.append({
-                **_build_stop_info(stop, None),
-                "error": f"Failed to fetch ETA: {str(eta_error)}",
+                **_build_stop_info(stop, None, lang=lang),
+                "error": f"Failed to fetch ETA: {str(eta_response)}",
             })
+        else:
+            stops_with_eta.append(_build_stop_info(stop, eta_response, route_filter, lang))
 
     logger.info(f"Workflow complete. Returning data for {len(stops_with_eta)} stops")
     return {
@@ -89,61 +73,309 @@ async def _eta_workflow(address: str, route_filter: str = None) -> dict:
         "longitude": longitude,
         "nearby_stops_count": len(nearby_stops),
         "stops_with_eta": stops_with_eta,
-        "search_radius_degrees": float(EnvLoadUtil.load_env("KMB_NEAR_STOP_DISTANCE", "0.003")),
+        "search_radius_meters": kmb_util.KMBRouterUtil.get_near_stop_radius_m(),
+    }
+
+
+async def _find_stops_for_query(latitude: float, longitude: float, route_filter: str = None) -> list:
+    nearby_stops = await kmb_util.KMBRouterUtil.load_near_stop_with_lat_lon(str(latitude), str(longitude))
+    if route_filter is not None:
+        # Skip stops the route never serves instead of fetching their ETAs and discarding them
+        nearby_stops = await kmb_util.KMBRouterUtil.filter_stops_by_route(nearby_stops, route_filter)
+    return nearby_stops
+
+
+async def _eta_workflow(address: str, route_filter: str = None, lang: str = None) -> dict:
+    """Shared ETA workflow: geocode address -> nearby stops -> ETAs."""
+    lat_lon = await kmb_util.KMBRouterUtil.get_lat_lon_from_address(address)
+    if "error" in lat_lon:
+        logger.error(f"Geocoding failed for address: {address}")
+        return _geocode_failed_result(address)
+
+    latitude, longitude = lat_lon["latitude"], lat_lon["longitude"]
+    logger.info(f"Geocoded to: lat={latitude}, lon={longitude}")
+
+    nearby_stops = await _find_stops_for_query(latitude, longitude, route_filter)
+    eta_responses = []
+    if nearby_stops:
+        logger.info(f"Found {len(nearby_stops)} nearby stops. Fetching ETAs...")
+        eta_responses = await kmb_util.KMBRouterUtil.fetch_kmb_eta_for_stops(nearby_stops, route_filter)
+    return _eta_result(address, latitude, longitude, nearby_stops, eta_responses, route_filter, lang)
+
+
+def _ndjson_line(payload: dict) -> bytes:
+    return orjson.dumps(payload) + b"\n"
+
+
+async def _eta_stream_workflow(address: str, route_filter: str = None, lang: str = None) -> AsyncIterator[bytes]:
+    """
+    Streaming ETA workflow as NDJSON: a "header" line once nearby stops are known, one
+    "stop" line per stop as soon as its ETA arrives, then a closing "done" line.
+    """
+    try:
+        lat_lon = await kmb_util.KMBRouterUtil.get_lat_lon_from_address(address)
+        if "error" in lat_lon:
+            logger.error(f"Geocoding failed for address: {address}")
+            yield _ndjson_line({"type": "error", **_geocode_failed_result(address)})
+            return
+
+        latitude, longitude = lat_lon["latitude"], lat_lon["longitude"]
+        nearby_stops = await _find_stops_for_query(latitude, longitude, route_filter)
+        yield _ndjson_line({
+            "type": "header",
+            "address": address,
+            "latitude": latitude,
+            "longitude": longitude,
+            "nearby_stops_count": len(nearby_stops),
+            "search_radius_meters": kmb_util.KMBRouterUtil.get_near_stop_radius_m(),
+        })
+
+        async for stop, eta_response in kmb_util.KMBRouterUtil.iter_kmb_eta_for_stops(nearby_stops, route_filter):
+            if isinstance(eta_response, Exception):
+                logger.error(f"Failed to fetch ETA for stop {stop.stop}: {str(eta_response)}")
+                stop_info = {**_build_stop_info(stop, None, lang=lang), "error": f"Failed to fetch ETA: {str(eta_response)}"}
+            else:
+                stop_info = _build_stop_info(stop, eta_response, route_filter, lang)
+            yield _ndjson_line({"type": "stop", **stop_info})
+
+        yield _ndjson_line({"type": "done", "stops": len(nearby_stops)})
+    except Exception as e:
+        logger.error(f"Error in ETA stream workflow: {str(e)}")
+        yield _ndjson_line({"type": "error", "error": str(e), "address": address})
+
+
+async def _eta_batch_workflow(queries: list[ETABatchQuery], lang: str = None) -> list[dict]:
+    """
+    Batch ETA workflow: geocode each distinct address once, union the nearby stops of
+    every query, fetch each distinct stop's ETA once, then assemble per-query results.
+    """
+    addresses = list(dict.fromkeys(query.address for query in queries))
+    lat_lons = await asyncio.gather(*[kmb_util.KMBRouterUtil.get_lat_lon_from_address(a) for a in addresses])
+    lat_lon_by_address = dict(zip(addresses, lat_lons))
+
+    geocoded = [query for query in queries if "error" not in lat_lon_by_address[query.address]]
+    stops_per_query = await asyncio.gather(*[
+        _find_stops_for_query(
+            lat_lon_by_address[query.address]["latitude"], lat_lon_by_address[query.address]["longitude"], query.route
+        )
+        for query in geocoded
+    ])
+    nearby_stops_by_query = {id(query): stops for query, stops in zip(geocoded, stops_per_query)}
+
+    unique_stops = {stop.stop: stop for stops in stops_per_query for stop in stops}
+    logger.info(f"Batch of {len(queries)} queries: {len(addresses)} addresses, {len(unique_stops)} distinct stops")
+    eta_responses = await kmb_util.KMBRouterUtil.fetch_kmb_eta_for_stops(list(unique_stops.values()))
+    eta_by_stop_id = dict(zip(unique_stops, eta_responses))
+
+    results = []
+    for query in queries:
+        lat_lon = lat_lon_by_address[query.address]
+        if "error" in lat_lon:
+            results.append({**_geocode_failed_result(query.address), "route": query.route})
+            continue
+        nearby_stops = nearby_stops_by_query[id(query)]
+        result = _eta_result(
+            query.address, lat_lon["latitude"], lat_lon["longitude"], nearby_stops,
+            [eta_by_stop_id[stop.stop] for stop in nearby_stops], query.route, lang,
+        )
+        results.append({**result, "route": query.route})
+    return results
+
+
+async def _route_content(route_id: str, bound: str, service_type: str, prefix: bool, lang: str):
+    data = await kmb_util.KMBRouterUtil.find_kmb_routes(route_id, bound=bound, service_type=service_type, prefix=prefix)
+    if data is None:
+        return {"error": "KMB route data is unavailable"}
+    if lang is None:
+        return data
+    return {
+        "type": data.type,
+        "version": data.version,
+        "generated_timestamp": data.generated_timestamp,
+        "data": kmb_util.get_global_kmb_util().project_routes(data.data, lang),
     }
 
 
+async def _near_stop_content(lat: str, lon: str, k: int | None, lang: str, wrap: bool = True):
+    if k is not None:
+        nearby_stops = await kmb_util.KMBRouterUtil.load_nearest_stops_with_lat_lon(lat, lon, k)
+    else:
+        nearby_stops = await kmb_util.KMBRouterUtil.load_near_stop_with_lat_lon(lat, lon)
+    if lang is not None:
+        nearby_stops = kmb_util.get_global_kmb_util().project_stops(nearby_stops, lang)
+    return {"nearby_stops": nearby_stops} if wrap else nearby_stops
+
+
+async def _eta_ws_reader(websocket: WebSocket, subscriber: EtaSubscriber):
+    hub = get_global_eta_subscription_hub()
+    while True:
+        frame = await websocket.receive()
+        if frame["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(frame.get("code", 1000), frame.get("reason"))
+        try:
+            message = EtaSubscriptionMessage.model_validate_json(frame.get("text") or frame.get("bytes") or "")
+        except ValidationError as e:
+            hub.push(subscriber, {
+                "type": "error",
+                "message": 'Expected {"action": "subscribe" | "unsubscribe", "stop_id": str, "route": optional str}',
+                "details": [f"{'.'.join(str(part) for part in error['loc']) or 'message'}: {error['msg']}"
+                            for error in e.errors()],
+            })
+            continue
+        if message.action == "subscribe":
+            await hub.subscribe(subscriber, message.stop_id, message.route)
+        else:
+            hub.unsubscribe(subscriber, message.stop_id, message.route)
+
+
+async def _eta_ws_writer(websocket: WebSocket, subscriber: EtaSubscriber):
+    while True:
+        await websocket.send_text(orjson.dumps(await subscriber.queue.get()).decode("utf-8"))
+
+
 @router.get("/")
 async def get_kmb_router():
     return {"message": "This is the KMB Router endpoint"}
 
+@router.get("/eta/cache_stats")
+async def get_eta_cache_stats():
+    return {
+        **kmb_util.get_global_kmb_util().get_eta_cache_stats(),
+        "subscriptions": get_global_eta_subscription_hub().stats(),
+        "catalog_responses": get_global_catalog_response_cache().stats(),
+    }
+
 @router.get("/route/{route_id}")
-async def get_kmb_router_by_route_id(route_id: str):
+async def get_kmb_router_by_route_id(request: Request, route_id: str, bound: str = None, service_type: str = None,
+                                     prefix: bool = False, lang: str = None):
     logger.info(f"Fetching KMB router data for route_id: {route_id}...")
     try:
-        data = await kmb_util.KMBRouterUtil.fetch_all_kmb_router()
-        return data
+        lang = LangViewUtil.parse_lang(lang)
+        digest = await kmb_util.KMBRouterUtil.get_route_catalog_digest()
+        if digest is None:
+            return {"error": "KMB route data is unavailable"}
+        return await get_global_catalog_response_cache().respond(
+            request, digest, ("route", route_id, bound, service_type, prefix, lang),
+            lambda: _route_content(route_id, bound, service_type, prefix, lang),
+        )
     except Exception as e:
         return {"error": str(e)}
 
 
 @router.get("/near_stop/ll/{lat}/{lon}")
-async def get_near_stop(lat: str, lon: str):
+async def get_near_stop(request: Request, lat: str, lon: str, k: int = None, lang: str = None):
     logger.info(f"Fetching KMB stop data near lat: {lat}, lon: {lon}...")
     try:
-        nearby_stops = await kmb_util.KMBRouterUtil.load_near_stop_with_lat_lon(lat, lon)
-        return {"nearby_stops": nearby_stops}
+        lang = LangViewUtil.parse_lang(lang)
+        digest = await kmb_util.KMBRouterUtil.get_stop_catalog_digest()
+        if digest is None:
+            return {"nearby_stops": []}
+        key = ("near_stop", lat, lon, k, kmb_util.KMBRouterUtil.get_near_stop_radius_m(), lang)
+        return await get_global_catalog_response_cache().respond(
+            request, digest, key, lambda: _near_stop_content(lat, lon, k, lang),
+        )
     except Exception as e:
         logger.error(f"Error in get_near_stop: {str(e)}")
         return {"error": str(e)}
     
 @router.get("/near_stop/address/{address}")
-async def get_ll_from_address(address: str):
+async def get_ll_from_address(request: Request, address: str, lang: str = None):
     logger.info(f"Fetching latitude and longitude for address: {address}...")
     try:
-        data = await kmb_util.KMBRouterUtil.load_near_stop_with_address(address)
-        return data
+        lang = LangViewUtil.parse_lang(lang)
+        lat_lon = await kmb_util.KMBRouterUtil.get_lat_lon_from_address(address)
+        digest = await kmb_util.KMBRouterUtil.get_stop_catalog_digest()
+        if "error" in lat_lon or digest is None:
+            logger.error(f"Failed to geocode address: {address}. No location found.")
+            return []
+        lat, lon = str(lat_lon["latitude"]), str(lat_lon["longitude"])
+        key = ("near_stop_address", lat, lon, kmb_util.KMBRouterUtil.get_near_stop_radius_m(), lang)
+        return await get_global_catalog_response_cache().respond(
+            request, digest, key, lambda: _near_stop_content(lat, lon, None, lang, wrap=False),
+        )
     except Exception as e:
         logger.error(f"Error in get_ll_from_address: {str(e)}")
         return {"error": str(e)}
 
 @router.get("/eta/address/{address}")
-async def get_eta_by_address(address: str):
+async def get_eta_by_address(address: str, lang: str = None):
     """Geocode address -> find nearby stops -> return ETAs for all routes."""
     logger.info(f"Starting ETA lookup workflow for address: {address}")
     try:
-        return await _eta_workflow(address)
+        return FastJSONResponse(await _eta_workflow(address, lang=LangViewUtil.parse_lang(lang)))
     except Exception as e:
         logger.error(f"Error in get_eta_by_address workflow: {str(e)}")
         return {"error": str(e), "address": address, "details": "An error occurred during the ETA lookup workflow"}
 
 
 @router.get("/eta/address/{address}/{route_number}")
-async def get_eta_by_address_and_route(address: str, route_number: str):
+async def get_eta_by_address_and_route(address: str, route_number: str, lang: str = None):
     """Geocode address -> find nearby stops -> return ETAs filtered by route number."""
     logger.info(f"Starting ETA lookup workflow for address: {address}, route: {route_number}")
     try:
-        return await _eta_workflow(address, route_filter=route_number)
+        return FastJSONResponse(
+            await _eta_workflow(address, route_filter=route_number, lang=LangViewUtil.parse_lang(lang))
+        )
     except Exception as e:
         logger.error(f"Error in get_eta_by_address workflow: {str(e)}")
-        return {"error": str(e), "address": address, "details": "An error occurred during the ETA lookup workflow"}
\ No newline at end of file
+        return {"error": str(e), "address": address, "details": "An error occurred during the ETA lookup workflow"}
+
+
+@router.get("/eta/stream/address/{address}")
+async def stream_eta_by_address(address: str, lang: str = None):
+    """Like /eta/address/{address}, streamed as NDJSON with one line per stop as its ETA arrives."""
+    logger.info(f"Starting streaming ETA lookup for address: {address}")
+    try:
+        lang = LangViewUtil.parse_lang(lang)
+    except ValueError as e:
+        return {"error": str(e), "address": address}
+    return StreamingResponse(_eta_stream_workflow(address, lang=lang), media_type="application/x-ndjson")
+
+
+@router.get("/eta/stream/address/{address}/{route_number}")
+async def stream_eta_by_address_and_route(address: str, route_number: str, lang: str = None):
+    """Like /eta/address/{address}/{route_number}, streamed as NDJSON."""
+    logger.info(f"Starting streaming ETA lookup for address: {address}, route: {route_number}")
+    try:
+        lang = LangViewUtil.parse_lang(lang)
+    except ValueError as e:
+        return {"error": str(e), "address": address}
+    return StreamingResponse(_eta_stream_workflow(address, route_filter=route_number, lang=lang),
+                             media_type="application/x-ndjson")
+
+
+@router.post("/eta/batch")
+async def get_eta_batch(request: ETABatchRequest):
+    """Answer many (address, route) queries while fetching each distinct stop's ETA only once."""
+    logger.info(f"Starting batch ETA lookup for {len(request.queries)} queries")
+    try:
+        return FastJSONResponse({"results": await _eta_batch_workflow(request.queries, LangViewUtil.parse_lang(request.lang))})
+    except Exception as e:
+        logger.error(f"Error in get_eta_batch workflow: {str(e)}")
+        return {"error": str(e), "details": "An error occurred during the batch ETA lookup workflow"}
+
+
+@router.websocket("/eta/ws")
+async def eta_subscriptions(websocket: WebSocket):
+    """
+    Live ETA push. Send {"action": "subscribe", "stop_id": ..., "route": optional} to
+    receive a snapshot followed by diffs whenever the shared poller sees a change.
+    """
+    await websocket.accept()
+    hub = get_global_eta_subscription_hub()
+    subscriber = hub.register()
+    tasks = [
+        asyncio.create_task(_eta_ws_reader(websocket, subscriber)),
+        asyncio.create_task(_eta_ws_writer(websocket, subscriber)),
+    ]
+    try:
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            error = task.exception()
+            if error is not None and not isinstance(error, WebSocketDisconnect):
+                logger.error(f"ETA subscription connection failed: {str(error)}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        hub.unregister(subscriber)
+        logger.info("ETA subscription connection closed")
@@ -0,0 +1,34 @@
+## pylint disable=W0613,W1203,E1136,W0718
+import logging
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from utils.metrics_util import get_global_stage_metrics
+from utils.kmb_util import get_global_kmb_util
+from utils.eta_subscription_util import get_global_eta_subscription_hub
+from utils.catalog_response_util import get_global_catalog_response_cache
+from utils.geocoder_util import get_global_async_geocoder
+from utils.geocode_cache_util import get_global_geocode_cache
+from utils.news_util import get_global_news_util
+from utils.digest_util import get_global_daily_summary_digest
+from utils.httpx_util import get_global_httpx_util
+
+router = APIRouter(tags=["metrics"])
+logger = logging.getLogger(__name__)
+
+_metrics = get_global_stage_metrics()
+_metrics.register_collector("kmb_eta", lambda: get_global_kmb_util().get_eta_cache_stats())
+_metrics.register_collector("eta_subscriptions", lambda: get_global_eta_subscription_hub().stats())
+_metrics.register_collector("catalog_responses", lambda: get_global_catalog_response_cache().stats())
+_metrics.register_collector("geocoder", lambda: get_global_async_geocoder().stats())
+_metrics.register_collector("geocode_cache", lambda: get_global_geocode_cache().stats())
+_metrics.register_collector("news", lambda: get_global_news_util().stats())
+_metrics.register_collector("daily_summary_digest", lambda: get_global_daily_summary_digest().stats())
+_metrics.register_collector("httpx", lambda: get_global_httpx_util().get_single_flight_stats())
+
+
+@router.get("/metrics")
+async def get_metrics():
+    """Prometheus text exposition of stage latencies and component stats."""
+    return PlainTextResponse(_metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
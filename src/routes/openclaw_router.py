@@ -1,25 +1,19 @@
 ## pylint disable=W0613,W1203,E1136,W0718
-import re
-import asyncio
 import logging
-import requests
 from datetime import datetime, timezone
 
 from fastapi import APIRouter
 
-from utils.env_load_util import EnvLoadUtil
 from utils import kmb_util
 from utils.hko_util import get_global_hko_router_util
+from utils.news_util import get_global_news_util
+from utils.digest_util import get_global_daily_summary_digest
+from utils.json_response_util import FastJSONResponse
+from utils.metrics_util import timed, stage_timer
 
 router = APIRouter(prefix="/openclaw_router", tags=["openclaw_router"])
 logger = logging.getLogger(__name__)
 
-def _clean_text(text: str) -> str:
-    if not text:
-        return ""
-    return re.sub(r'[^\w\s]', ' ', text).strip()
-
-
 def _calc_remaining_minutes(eta_str: str) -> int | None:
     if not eta_str:
         return None
@@ -34,44 +28,9 @@ def _calc_remaining_minutes(eta_str: str) -> int | None:
         return None
 
 
-def _get_news_summary(keyword: str) -> list:
-    newsapi_key = EnvLoadUtil.load_env("NEWS_API_KEY")
-    if not newsapi_key:
-        logger.error("NEWS_API_KEY is not set or empty in .env")
-        return []
-    
-    url = ('https://newsapi.org/v2/everything?'
-       'q={keyword}&'
-       'sortBy=publishedAt&'
-       'language=en&'
-       'apiKey={newsapi_key}').format(keyword=keyword, newsapi_key=newsapi_key)
-    
-    try:
-        response = requests.get(url)
-        news_data = response.json()
-        
-        logger.info(f"Raw response status: {news_data.get('status')}")
-        logger.info(f"Total results: {news_data.get('totalResults')}")
-        logger.info(f"Articles count: {len(news_data.get('articles', []))}")
-
-        result = []
-        for article in news_data.get('articles', [])[:10]:
-            description = article.get('description') or ""
-            logger.info(f"Article desc length: {len(description)} | title: {article.get('title','')[:40]}")
-            if len(description) > 30:
-                result.append({
-                    "source": _clean_text(article['source']['name']),
-                    "title": _clean_text(article['title']),
-                    "description": _clean_text(description),
-                    "publishedAt": article['publishedAt'],
-                })
-        
-        logger.info(f"Returning {len(result)} news articles")
-        return result
-                
-    except Exception as e:
-        logger.error(f"Error fetching news summary: {str(e)}")
-        return []
+@timed("news")
+async def _get_news_summary(keyword: str) -> list:
+    return await get_global_news_util().get_news_summary(keyword)
 
 
 async def _weather_task(address: str, lang: str, user_coords: tuple | None) -> dict:
@@ -104,18 +63,16 @@ async def _transport_task(lat: float, lon: float, route_filter: str) -> dict:
         nearby_stops = await kmb_util.KMBRouterUtil.load_near_stop_with_lat_lon(
             str(lat), str(lon)
         )
+        nearby_stops = await kmb_util.KMBRouterUtil.filter_stops_by_route(nearby_stops, route_filter)
         if not nearby_stops:
             return {
                 "route": route_filter,
                 "stops": [],
-                "search_radius_degrees": float(EnvLoadUtil.load_env("KMB_NEAR_STOP_DISTANCE", "0.003")),
+                "search_radius_meters": kmb_util.KMBRouterUtil.get_near_stop_radius_m(),
             }
 
-        # Fetch all stop ETAs concurrently instead of sequentially
-        eta_responses = await asyncio.gather(
-            *[kmb_util.KMBRouterUtil.fetch_kmb_eta_stop_by_stop_id(stop.stop) for stop in nearby_stops],
-            return_exceptions=True,
-        )
+        # Fetch all stop ETAs concurrently with a bounded fan-out and per-stop timeout
+        eta_responses = await kmb_util.KMBRouterUtil.fetch_kmb_eta_for_stops(nearby_stops, route_filter)
 
         stops_summary = []
         for stop, eta_response in zip(nearby_stops, eta_responses):
@@ -143,7 +100,7 @@ async def _transport_task(lat: float, lon: float, route_filter: str) -> dict:
 
         return {
             "route": route_filter,
-            "search_radius_degrees": float(EnvLoadUtil.load_env("KMB_NEAR_STOP_DISTANCE", "0.003")),
+            "search_radius_meters": kmb_util.KMBRouterUtil.get_near_stop_radius_m(),
             "stops": stops_summary,
         }
     except Exception as e:
@@ -151,6 +108,43 @@ async def _transport_task(lat: float, lon: float, route_filter: str) -> dict:
         return {"error": str(e)}
 
 
+async def _geocode_user_address(address: str) -> tuple | None:
+    # Geocodes are cached and deduplicated, so every section can resolve the address itself
+    try:
+        lat_lon = await kmb_util.KMBRouterUtil.get_lat_lon_from_address(address)
+    except Exception as e:
+        logger.error(f"Geocoding raised unexpectedly for '{address}': {str(e)}")
+        return None
+    if "error" in lat_lon:
+        logger.warning(f"Geocoding failed for '{address}'")
+        return None
+    return lat_lon["latitude"], lat_lon["longitude"]
+
+
+@timed("daily_summary_weather")
+async def _weather_section(address: str, lang: str) -> dict:
+    # Without coordinates the weather task attempts its own geocode
+    user_coords = await _geocode_user_address(address)
+    return await _weather_task(address, lang, user_coords)
+
+
+@timed("daily_summary_transport")
+async def _transport_section(address: str, route_filter: str) -> dict:
+    user_coords = await _geocode_user_address(address)
+    if not user_coords:
+        return {"error": "Geocoding failed"}
+    return await _transport_task(user_coords[0], user_coords[1], route_filter)
+
+
+@timed("daily_summary_news")
+async def _news_section(keyword: str) -> list:
+    try:
+        return await _get_news_summary(keyword)
+    except Exception as e:
+        logger.error(f"News task raised an exception: {str(e)}")
+        return []
+
+
 @router.get("/")
 async def get_hko_router():
     return {"message": "This is the openclaw_router endpoint"}
@@ -160,39 +154,23 @@ async def get_hko_router():
 async def get_daily_summary(lang: str, keyword: str,address: str, router: str):
     logger.info(f"Fetching daily summary for language: {lang}, address: {address}, router: {router}, keyword: {keyword}...")
 
-    # Geocode once — shared by weather and transport; failures yield empty sections, not 500
-    try:
-        lat_lon = await kmb_util.KMBRouterUtil.get_lat_lon_from_address(address)
-    except Exception as e:
-        logger.error(f"Geocoding raised unexpectedly for '{address}': {str(e)}")
-        lat_lon = {"error": str(e)}
+    # Each section is cached and refreshed on its own schedule; a poll is answered from memory
+    digest = get_global_daily_summary_digest()
+    with stage_timer("daily_summary"):
+        sections, freshness = await digest.get(
+            (lang, keyword.strip().casefold(), address.strip().casefold(), router.strip()),
+            {
+                "weather": lambda: _weather_section(address, lang),
+                "transport": lambda: _transport_section(address, router),
+                "news": lambda: _news_section(keyword),
+            },
+        )
 
-    if "error" in lat_lon:
-        logger.warning(f"Geocoding failed for '{address}', weather will attempt its own geocode")
-        lat, lon, user_coords = None, None, None
-    else:
-        lat, lon = lat_lon["latitude"], lat_lon["longitude"]
-        user_coords = (lat, lon)
-
-    weather_result, transport_result, news_result = await asyncio.gather(
-        _weather_task(address, lang, user_coords),
-        _transport_task(lat, lon, router) if user_coords else asyncio.sleep(0, result={"error": "Geocoding failed"}),
-        asyncio.to_thread(_get_news_summary, keyword),
-        return_exceptions=True,
-    )
-
-    if isinstance(weather_result, Exception):
-        weather_result = {"error": str(weather_result)}
-    if isinstance(transport_result, Exception):
-        transport_result = {"error": str(transport_result)}
-    if isinstance(news_result, Exception):
-        logger.error(f"News task raised an exception: {str(news_result)}")
-        news_result = []
-
-    return {
+    return FastJSONResponse({
         "address": address,
         "lang": lang,
-        "weather": weather_result,
-        "transport": transport_result,
-        "news": news_result,
-    }
+        "weather": sections["weather"],
+        "transport": sections["transport"],
+        "news": sections["news"],
+        "freshness": freshness,
+    })
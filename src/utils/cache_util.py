@@ -0,0 +1,109 @@
+# pylint: disable=W0603,E0402,W1203,W0718
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with a fresh TTL and a stale-while-revalidate window.
+
+    Entries younger than `ttl` are served as hits. Entries older than `ttl` but
+    younger than `ttl + stale_ttl` are served immediately while a single
+    background refresh replaces them. Anything older is treated as a miss.
+    """
+
+    def __init__(self, ttl: float = 30.0, stale_ttl: float = 30.0, max_size: int = 1024, name: str = "cache"):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+        self.name = name
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._refreshing: dict[Hashable, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> tuple[Any, float] | None:
+        """Return (value, age_seconds) if the key is cached and not expired, else None."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        age = time.monotonic() - stored_at
+        if age > self.ttl + self.stale_ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value, age
+
+    def set(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable = None):
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Serve `key` from cache, refreshing it with `fetch()` when missing or stale.
+        `None` results are not cached so a failed upstream call is retried next time.
+        """
+        cached = self.get(key)
+        if cached is not None:
+            value, age = cached
+            if age <= self.ttl:
+                self.hits += 1
+                return value
+            self.stale_hits += 1
+            self._schedule_refresh(key, fetch)
+            return value
+
+        self.misses += 1
+        value = await fetch()
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def _schedule_refresh(self, key: Hashable, fetch: Callable[[], Awaitable[Any]]):
+        if key in self._refreshing:
+            return
+
+        async def _refresh():
+            try:
+                value = await fetch()
+                if value is not None:
+                    self.set(key, value)
+            except Exception as e:
+                logger.warning(f"[{self.name}] Background refresh failed for {key}: {str(e)}")
+            finally:
+                self._refreshing.pop(key, None)
+
+        self._refreshing[key] = asyncio.create_task(_refresh())
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,159 @@
+# pylint: disable=W0603,E0402,W1203
+import gzip
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+from fastapi import Request, Response
+
+from .env_load_util import EnvLoadUtil
+from .json_response_util import FastJSONResponse, dumps
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogResponseCache:
+    """
+    Conditional, compressed responses for endpoints built purely from the KMB catalogs.
+
+    The ETag hashes the catalog's content digest together with the request parameters,
+    so it is known before any work is done: a matching If-None-Match gets a 304 straight
+    away. Each content coding gets its own ETag ("<hash>", "<hash>-gzip", "<hash>-br"),
+    compared weakly as If-None-Match requires. Otherwise the JSON body is built once per ETag and kept, along with its gzip
+    (and, when the brotli package is installed, br) form for bodies of at least
+    `min_compress_size` bytes. At most `max_size` ETags are kept, least recently used first out.
+    """
+
+    def __init__(self, max_size: int = 256, min_compress_size: int = 1024, gzip_level: int = 6, max_age: int = 300):
+        self.max_size = max_size
+        self.min_compress_size = min_compress_size
+        self.gzip_level = gzip_level
+        self.max_age = max_age
+        self._entries: OrderedDict[str, dict[str, bytes]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    @staticmethod
+    def catalog_digest(catalog) -> str:
+        """Digest of a catalog's version and rows; unchanged catalogs keep their ETags across refreshes."""
+        digest = hashlib.blake2b(digest_size=12)
+        digest.update(str(catalog.version).encode("utf-8"))
+        for item in catalog.data:
+            digest.update("\x1f".join(str(value) for value in vars(item).values()).encode("utf-8"))
+            digest.update(b"\x1e")
+        return digest.hexdigest()
+
+    @staticmethod
+    def make_etag(catalog_digest: str, key: Hashable) -> str:
+        return '"' + hashlib.blake2b(repr((catalog_digest, key)).encode("utf-8"), digest_size=12).hexdigest() + '"'
+
+    @staticmethod
+    def encoded_etag(etag: str, encoding: str) -> str:
+        """The ETag of `etag`'s representation in `encoding`, e.g. "<hash>" -> "<hash>-gzip"."""
+        return etag if encoding == "identity" else f'{etag[:-1]}-{encoding}"'
+
+    @staticmethod
+    def matching_etag(if_none_match: str | None, etags: list[str]) -> str | None:
+        """The first of `etags` that If-None-Match matches under weak comparison, else None."""
+        if not if_none_match:
+            return None
+        candidates = {candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")}
+        if "*" in candidates:
+            return etags[0]
+        return next((etag for etag in etags if etag.removeprefix("W/") in candidates), None)
+
+    @staticmethod
+    def choose_encoding(accept_encoding: str | None) -> str:
+        accepted = set()
+        for part in (accept_encoding or "").split(","):
+            coding, _, params = part.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+                continue
+            accepted.add(coding.strip().lower())
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return "identity"
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=5)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def respond(self, request: Request, catalog_digest: str, key: Hashable,
+                      build: Callable[[], Awaitable[Any]]) -> Response:
+        """
+        Answer from cache, with a 304, or by awaiting `build()` for the JSON content.
+        Content that is None or an error dict is returned as-is and never cached.
+        """
+        etag = self.make_etag(catalog_digest, key)
+        encoding = self.choose_encoding(request.headers.get("accept-encoding"))
+        headers = {
+            "Cache-Control": f"public, max-age={self.max_age}",
+            "Vary": "Accept-Encoding",
+        }
+        # Same digest means the same body, so the client's copy is current whichever coding it holds
+        candidates = [self.encoded_etag(etag, encoding)]
+        if encoding != "identity":
+            candidates.append(etag)
+        matched = self.matching_etag(request.headers.get("if-none-match"), candidates)
+        if matched is not None:
+            self.not_modified += 1
+            headers["ETag"] = matched
+            return Response(status_code=304, headers=headers)
+
+        entry = self._entries.get(etag)
+        if entry is None:
+            self.misses += 1
+            content = await build()
+            if content is None or (isinstance(content, dict) and "error" in content):
+                return FastJSONResponse(content)
+            entry = {"identity": dumps(content)}
+            self._entries[etag] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        else:
+            self.hits += 1
+            self._entries.move_to_end(etag)
+
+        if encoding != "identity" and len(entry["identity"]) >= self.min_compress_size:
+            if encoding not in entry:
+                entry[encoding] = await asyncio.to_thread(self._compress, entry["identity"], encoding)
+            headers["ETag"] = self.encoded_etag(etag, encoding)
+            headers["Content-Encoding"] = encoding
+            return Response(entry[encoding], media_type="application/json", headers=headers)
+        headers["ETag"] = etag
+        return Response(entry["identity"], media_type="application/json", headers=headers)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "brotli": brotli is not None,
+        }
+
+
+_GLOBAL_CATALOG_RESPONSE_CACHE_INSTANCE = None
+def get_global_catalog_response_cache() -> CatalogResponseCache:
+    global _GLOBAL_CATALOG_RESPONSE_CACHE_INSTANCE
+    if _GLOBAL_CATALOG_RESPONSE_CACHE_INSTANCE is None:
+        settings = EnvLoadUtil.settings()
+        _GLOBAL_CATALOG_RESPONSE_CACHE_INSTANCE = CatalogResponseCache(
+            max_size=settings.catalog_response_cache_max_size,
+            min_compress_size=settings.catalog_response_min_compress_size,
+            gzip_level=settings.catalog_response_gzip_level,
+            max_age=settings.catalog_response_max_age,
+        )
+    return _GLOBAL_CATALOG_RESPONSE_CACHE_INSTANCE
@@ -0,0 +1,223 @@
+# pylint: disable=W0603,E0402,W1203,W0718
+import os
+import json
+import shutil
+import asyncio
+import logging
+from typing import Sequence
+
+import numpy as np
+
+from .env_load_util import EnvLoadUtil
+from .stop_index_util import StopIndex
+from .catalog_response_util import CatalogResponseCache
+
+from models.kmb.stop.stop_response import Stop, StopListResponse
+from models.kmb.router.route_lane import RouterLane, KMBRouterResponse
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FORMAT_VERSION = 1
+STOP_FIELDS = ("stop", "name_en", "name_tc", "name_sc", "lat", "long")
+ROUTE_FIELDS = ("route", "bound", "service_type", "orig_en", "orig_tc", "orig_sc", "dest_en", "dest_tc", "dest_sc")
+
+
+class SnapshotRows(Sequence):
+    """
+    One catalog table read straight from its mmapped int32 columns.
+
+    A row is turned into a model on first access and kept, so a near-stop query only
+    materializes the stops it returns and repeated hits get the same object back.
+    """
+
+    def __init__(self, snapshot: "CatalogSnapshot", columns: np.ndarray, field_names: tuple[str, ...], model: type):
+        self._snapshot = snapshot
+        self._columns = columns
+        self._field_names = field_names
+        self._model = model
+        self._rows: list = [None] * columns.shape[0]
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self._rows)))]
+        row = self._rows[i]
+        if row is None:
+            string = self._snapshot.string
+            row = self._model.model_construct(
+                **{field: string(string_id) for field, string_id in zip(self._field_names, self._columns[i].tolist())}
+            )
+            self._rows[i] = row
+        return row
+
+    def materialized_count(self) -> int:
+        return len(self._rows) - self._rows.count(None)
+
+
+class CatalogSnapshot:
+    """
+    Memory-mapped view of a compiled stop/route catalog.
+
+    Columns are stored as int32 ids into one interned UTF-8 string table, coordinates
+    as float64 arrays next to their projected east/north form. The .npy files are opened
+    with mmap_mode="r", so every worker shares the same page cache; the KD-tree is built
+    over the mmapped projected coordinates and rows become models only when read.
+    """
+
+    def __init__(self, snapshot_dir: str):
+        self.snapshot_dir = snapshot_dir
+        with open(os.path.join(snapshot_dir, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version: {self.meta.get('format_version')}")
+        self._strings = np.load(self._path("strings.npy"), mmap_mode="r")
+        self._string_offsets = np.load(self._path("string_offsets.npy"), mmap_mode="r")
+        self._decoded: dict[int, str] = {}
+        self.stop_columns = np.load(self._path("stop_columns.npy"), mmap_mode="r")
+        self.stop_coords = np.load(self._path("stop_coords.npy"), mmap_mode="r")
+        self.stop_xy = np.load(self._path("stop_xy.npy"), mmap_mode="r")
+        self.route_columns = np.load(self._path("route_columns.npy"), mmap_mode="r")
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.snapshot_dir, name)
+
+    def string(self, string_id: int) -> str:
+        value = self._decoded.get(string_id)
+        if value is None:
+            start, end = self._string_offsets[string_id:string_id + 2].tolist()
+            value = self._strings[start:end].tobytes().decode("utf-8")
+            self._decoded[string_id] = value
+        return value
+
+    def stop_list(self) -> StopListResponse:
+        meta = self.meta["stop"]
+        return StopListResponse.model_construct(
+            type=meta["type"], version=meta["version"], generated_timestamp=meta["generated_timestamp"],
+            data=SnapshotRows(self, self.stop_columns, STOP_FIELDS, Stop),
+        )
+
+    def route_list(self) -> KMBRouterResponse:
+        meta = self.meta["route"]
+        return KMBRouterResponse.model_construct(
+            type=meta["type"], version=meta["version"], generated_timestamp=meta["generated_timestamp"],
+            data=SnapshotRows(self, self.route_columns, ROUTE_FIELDS, RouterLane),
+        )
+
+    def stop_digest(self) -> str | None:
+        return self.meta["stop"].get("digest")
+
+    def route_digest(self) -> str | None:
+        return self.meta["route"].get("digest")
+
+    def stop_index(self) -> StopIndex:
+        return StopIndex.from_prebuilt(self.stop_xy, tuple(self.meta["index_origin"]), None)
+
+
+class CatalogSnapshotUtil:
+
+    @staticmethod
+    def get_snapshot_dir() -> str:
+        return os.path.normpath(os.path.join(
+            EnvLoadUtil.settings().base_folder, "res", EnvLoadUtil.settings().kmb_snapshot_dir
+        ))
+
+    @staticmethod
+    def build(stop_list: StopListResponse, route_list: KMBRouterResponse, snapshot_dir: str = None) -> str:
+        """Compile the catalogs into a snapshot directory, replacing any existing one atomically."""
+        snapshot_dir = snapshot_dir or CatalogSnapshotUtil.get_snapshot_dir()
+        interned: dict[str, int] = {}
+
+        def intern(value: str) -> int:
+            string_id = interned.get(value)
+            if string_id is None:
+                string_id = len(interned)
+                interned[value] = string_id
+            return string_id
+
+        stop_columns = np.array(
+            [[intern(getattr(stop, field)) for field in STOP_FIELDS] for stop in stop_list.data], dtype=np.int32
+        ).reshape(-1, len(STOP_FIELDS))
+        route_columns = np.array(
+            [[intern(getattr(lane, field)) for field in ROUTE_FIELDS] for lane in route_list.data], dtype=np.int32
+        ).reshape(-1, len(ROUTE_FIELDS))
+
+        encoded = [value.encode("utf-8") for value in interned]
+        string_offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        string_offsets[1:] = np.cumsum([len(value) for value in encoded])
+        strings = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+        stop_coords = np.array(
+            [[float(stop.lat), float(stop.long)] for stop in stop_list.data], dtype=np.float64
+        ).reshape(-1, 2)
+        index = StopIndex(stop_coords[:, 0], stop_coords[:, 1])
+
+        meta = {
+            "format_version": SNAPSHOT_FORMAT_VERSION,
+            "stop": {
+                "type": stop_list.type,
+                "version": stop_list.version,
+                "generated_timestamp": stop_list.generated_timestamp,
+                "count": len(stop_list.data),
+                "digest": CatalogResponseCache.catalog_digest(stop_list),
+            },
+            "route": {
+                "type": route_list.type,
+                "version": route_list.version,
+                "generated_timestamp": route_list.generated_timestamp,
+                "count": len(route_list.data),
+                "digest": CatalogResponseCache.catalog_digest(route_list),
+            },
+            "index_origin": list(index.origin),
+        }
+
+        tmp_dir = f"{snapshot_dir}.tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        np.save(os.path.join(tmp_dir, "strings.npy"), strings)
+        np.save(os.path.join(tmp_dir, "string_offsets.npy"), string_offsets)
+        np.save(os.path.join(tmp_dir, "stop_columns.npy"), stop_columns)
+        np.save(os.path.join(tmp_dir, "stop_coords.npy"), stop_coords)
+        np.save(os.path.join(tmp_dir, "stop_xy.npy"), index.xy)
+        np.save(os.path.join(tmp_dir, "route_columns.npy"), route_columns)
+        with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=4)
+
+        old_dir = f"{snapshot_dir}.old"
+        shutil.rmtree(old_dir, ignore_errors=True)
+        if os.path.isdir(snapshot_dir):
+            os.replace(snapshot_dir, old_dir)
+        os.replace(tmp_dir, snapshot_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+        logger.info(f"Built catalog snapshot at {snapshot_dir}: {len(stop_list.data)} stops, "
+                    f"{len(route_list.data)} routes, {len(interned)} interned strings")
+        return snapshot_dir
+
+    @staticmethod
+    def load(snapshot_dir: str = None) -> CatalogSnapshot | None:
+        snapshot_dir = snapshot_dir or CatalogSnapshotUtil.get_snapshot_dir()
+        if not os.path.isfile(os.path.join(snapshot_dir, "meta.json")):
+            return None
+        try:
+            return CatalogSnapshot(snapshot_dir)
+        except Exception as e:
+            logger.error(f"Failed to load catalog snapshot from {snapshot_dir}. Error: {str(e)}")
+            return None
+
+
+async def _build_from_files():
+    # Imported here to avoid a circular import with kmb_util, which reads snapshots
+    from .kmb_util import KMBRouterUtil
+    stop_list = await KMBRouterUtil.load_stop_data_from_file(use_snapshot=False)
+    route_list = await KMBRouterUtil.load_kmb_router_data_from_file(use_snapshot=False)
+    if stop_list is None or route_list is None:
+        raise SystemExit("Failed to load stop/route JSON catalogs, snapshot not built")
+    CatalogSnapshotUtil.build(stop_list, route_list)
+
+
+if __name__ == "__main__":
+    # Build step, run from src/: python -m utils.catalog_snapshot_util
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    asyncio.run(_build_from_files())
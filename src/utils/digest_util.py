@@ -0,0 +1,150 @@
+# pylint: disable=W0603,E0402,W1203,W0718
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Hashable
+
+from .env_load_util import EnvLoadUtil
+
+logger = logging.getLogger(__name__)
+
+SectionLoader = Callable[[], Awaitable[Any]]
+
+
+class _Section:
+    __slots__ = ("value", "updated_at", "updated_at_wall", "refreshing")
+
+    def __init__(self, value: Any):
+        self.value = value
+        self.updated_at = time.monotonic()
+        self.updated_at_wall = datetime.now(timezone.utc)
+        self.refreshing: asyncio.Task | None = None
+
+
+class DigestCache:
+    """
+    Response-level cache made of independently refreshed sections.
+
+    Each section has its own freshness TTL. A poll returns every section from memory;
+    sections older than their TTL are refreshed in the background, one task per section.
+    Only a missing section, or one older than `hard_ttl_factor` x its TTL, is loaded
+    inline. Sections that returned an error dict are retried on the next poll.
+    Entries not polled for `idle_ttl` seconds are dropped, and at most `max_size` are kept.
+    """
+
+    def __init__(self, section_ttls: dict[str, float], hard_ttl_factor: float = 3.0, idle_ttl: float = 3600,
+                 max_size: int = 256):
+        self.section_ttls = section_ttls
+        self.hard_ttl_factor = hard_ttl_factor
+        self.idle_ttl = idle_ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[Hashable, tuple[dict[str, _Section], list]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.background_refreshes = 0
+
+    @staticmethod
+    def _is_error(value: Any) -> bool:
+        return isinstance(value, dict) and "error" in value
+
+    def _evict(self):
+        now = time.monotonic()
+        for key in [k for k, (_, last_poll) in self._entries.items() if now - last_poll[0] > self.idle_ttl]:
+            del self._entries[key]
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: Hashable, loaders: dict[str, SectionLoader]) -> tuple[dict[str, Any], dict[str, dict]]:
+        """Return ({section: value}, {section: freshness metadata}) for `key`."""
+        self._evict()
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            entry = ({}, [time.monotonic()])
+            self._entries[key] = entry
+        else:
+            self.hits += 1
+            entry[1][0] = time.monotonic()
+        self._entries.move_to_end(key)
+        sections = entry[0]
+
+        now = time.monotonic()
+        inline = []
+        for name, loader in loaders.items():
+            section = sections.get(name)
+            ttl = self.section_ttls.get(name, 0)
+            if section is None or now - section.updated_at > ttl * self.hard_ttl_factor:
+                inline.append(name)
+            elif now - section.updated_at > ttl or self._is_error(section.value):
+                self._schedule_refresh(sections, name, loader)
+
+        if inline:
+            values = await asyncio.gather(*[loaders[name]() for name in inline], return_exceptions=True)
+            for name, value in zip(inline, values):
+                if isinstance(value, Exception):
+                    logger.error(f"Digest section '{name}' failed: {str(value)}")
+                    value = {"error": str(value)}
+                sections[name] = _Section(value)
+
+        now = time.monotonic()
+        values = {name: sections[name].value for name in loaders}
+        meta = {
+            name: {
+                "age_seconds": round(now - sections[name].updated_at, 3),
+                "updated_at": sections[name].updated_at_wall.isoformat(),
+                "max_age_seconds": self.section_ttls.get(name, 0),
+                "refreshing": sections[name].refreshing is not None,
+            }
+            for name in loaders
+        }
+        return values, meta
+
+    def _schedule_refresh(self, sections: dict[str, _Section], name: str, loader: SectionLoader):
+        section = sections[name]
+        if section.refreshing is not None:
+            return
+
+        async def _refresh():
+            try:
+                value = await loader()
+                if self._is_error(value) and not self._is_error(section.value):
+                    # Keep serving the last good value rather than replacing it with an error
+                    logger.warning(f"Digest section '{name}' refresh returned an error, keeping previous value")
+                    return
+                sections[name] = _Section(value)
+            except Exception as e:
+                logger.error(f"Digest section '{name}' background refresh failed: {str(e)}")
+            finally:
+                section.refreshing = None
+
+        self.background_refreshes += 1
+        section.refreshing = asyncio.create_task(_refresh())
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "background_refreshes": self.background_refreshes,
+        }
+
+
+_GLOBAL_DAILY_SUMMARY_DIGEST_INSTANCE = None
+def get_global_daily_summary_digest() -> DigestCache:
+    global _GLOBAL_DAILY_SUMMARY_DIGEST_INSTANCE
+    if _GLOBAL_DAILY_SUMMARY_DIGEST_INSTANCE is None:
+        settings = EnvLoadUtil.settings()
+        _GLOBAL_DAILY_SUMMARY_DIGEST_INSTANCE = DigestCache(
+            section_ttls={
+                "transport": settings.digest_transport_ttl,
+                "weather": settings.digest_weather_ttl,
+                "news": settings.digest_news_ttl,
+            },
+            hard_ttl_factor=settings.digest_hard_ttl_factor,
+            idle_ttl=settings.digest_idle_ttl,
+            max_size=settings.digest_max_size,
+        )
+    return _GLOBAL_DAILY_SUMMARY_DIGEST_INSTANCE
@@ -1,25 +1,169 @@
 import os
+import signal
+import asyncio
+import logging
+from dataclasses import dataclass, fields
+from types import MappingProxyType
+
 import dotenv
 
+logger = logging.getLogger(__name__)
+
+# Variables that are no longer read, with what replaced them
+_RETIRED_ENV_VARS = {
+    "KMB_NEAR_STOP_DISTANCE": (
+        "near-stop search is now a circle of KMB_NEAR_STOP_RADIUS_M meters (default 300), not a "
+        "±KMB_NEAR_STOP_DISTANCE degree lat/long square. The old default 0.003 covered about 0.41 km², "
+        "an equal-area circle has a radius of about 360 m; set KMB_NEAR_STOP_RADIUS_M instead"
+    ),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class Settings:
+    """Typed application settings. Each field is read from the env var of the same name in upper case."""
+    application_server_host: str = "127.0.0.1"
+    application_server_port: int = 8000
+    base_folder: str = ""
+
+    kmb_stop_data: str = "stop_data.json"
+    kmb_route_data: str = "route_data.json"
+    kmb_route_stop_data: str = "route_stop_data.json"
+    kmb_snapshot_dir: str = "snapshot"
+    hko_station_data: str = "hko_station_data.json"
+
+    default_httpx_timeout: float = 60
+    httpx_max_connections: int = 100
+    httpx_max_keepalive_connections: int = 20
+    httpx_keepalive_expiry: float = 30
+    httpx_per_host_limit: int = 10
+    httpx_http2: bool = True
+
+    kmb_eta_cache_ttl: float = 30
+    kmb_eta_cache_stale_ttl: float = 30
+    kmb_eta_cache_max_size: int = 2048
+    kmb_route_eta_cache_max_size: int = 512
+    kmb_route_eta_mode: bool = True
+    kmb_eta_fast_decode: bool = True
+    kmb_eta_fan_out_limit: int = 8
+    kmb_eta_fetch_timeout: float = 5
+    # Radius of the near-stop search circle, reported to clients as search_radius_meters.
+    # Replaces KMB_NEAR_STOP_DISTANCE, the half-width in degrees of a lat/long square (~30% more area at 0.003).
+    kmb_near_stop_radius_m: float = 300
+    kmb_catalog_refresh_interval: float = 6 * 3600
+
+    geocode_cache_file: str = "geocode_cache.sqlite3"
+    geocode_cache_ttl: float = 30 * 24 * 3600
+    geocode_cache_negative_ttl: float = 3600
+    geocode_cache_max_size: int = 10000
+    geocoder_rate_per_second: float = 1
+    geocoder_burst: int = 1
+    geocoder_timeout: float = 10
+    geocoder_max_workers: int = 2
+
+    news_api_key: str = ""
+    news_api_timeout: float = 5
+    news_api_daily_quota: int = 100
+    news_cache_ttl: float = 15 * 60
+    news_cache_stale_ttl: float = 45 * 60
+    news_cache_max_size: int = 256
+
+    digest_transport_ttl: float = 30
+    digest_weather_ttl: float = 10 * 60
+    digest_news_ttl: float = 15 * 60
+    digest_hard_ttl_factor: float = 3
+    digest_idle_ttl: float = 3600
+    digest_max_size: int = 256
+
+    eta_subscription_poll_interval: float = 15
+    eta_subscription_max_stops: int = 50
+    eta_subscription_queue_size: int = 100
+
+    catalog_response_cache_max_size: int = 256
+    catalog_response_min_compress_size: int = 1024
+    catalog_response_gzip_level: int = 6
+    catalog_response_max_age: int = 300
+
+    metrics_enabled: bool = True
+
+    @staticmethod
+    def _convert(value: str, target_type: type):
+        if target_type is bool:
+            return value.strip().lower() in ("1", "true", "yes", "on")
+        return target_type(value)
+
+    @classmethod
+    def from_mapping(cls, config) -> "Settings":
+        for name, replacement in _RETIRED_ENV_VARS.items():
+            if config.get(name):
+                logger.warning(f"{name}={config[name]!r} is ignored: {replacement}")
+        values = {}
+        for field in fields(cls):
+            raw = config.get(field.name.upper())
+            if raw is None or raw == "":
+                continue
+            try:
+                values[field.name] = cls._convert(raw, field.type)
+            except ValueError:
+                logger.error(f"Invalid value for {field.name.upper()}: {raw!r}, using default {field.default!r}")
+        return cls(**values)
+
+
 class EnvLoadUtil:
-    
+
     ALL_KMB_ROUTER_URL = "https://data.etabus.gov.hk/v1/transport/kmb/route/"
     KMB_ROUTER_ETA_URL = "https://data.etabus.gov.hk/v1/transport/kmb/stop-eta/{stop_id}"
     KMB_STOP_URL = "https://data.etabus.gov.hk/v1/transport/kmb/stop"
     KMB_ETA_ROUTE_URL = "https://data.etabus.gov.hk/v1/transport/kmb/route-stop/{route}/{direction}/{service_type}"
+    ALL_KMB_ROUTE_STOP_URL = "https://data.etabus.gov.hk/v1/transport/kmb/route-stop"
+    KMB_ROUTE_ETA_URL = "https://data.etabus.gov.hk/v1/transport/kmb/route-eta/{route}/{service_type}"
+    NEWS_API_URL = "https://newsapi.org/v2/everything"
     HKO_WEATHER_URL = "https://data.weather.gov.hk/weatherAPI/opendata/weather.php?dataType={data_type}&lang={lang}"
 
+    # .env is parsed once; both are replaced wholesale by reload()
+    _config: MappingProxyType = None
+    _settings: Settings = None
+
+    @staticmethod
+    def _ensure_loaded():
+        if EnvLoadUtil._config is None:
+            EnvLoadUtil.reload(override=False)
+
+    @staticmethod
+    def reload(override: bool = True) -> Settings:
+        """
+        Re-read .env and the process environment. Values that objects copied at
+        construction time (pool and cache sizes) only change after a restart.
+        """
+        dotenv.load_dotenv(override=override)
+        config = MappingProxyType(dict(os.environ))
+        settings = Settings.from_mapping(config)
+        EnvLoadUtil._config, EnvLoadUtil._settings = config, settings
+        logger.info("Loaded environment configuration")
+        return settings
+
+    @staticmethod
+    def install_reload_signal_handler():
+        """Reload configuration on SIGHUP where the platform and event loop support it."""
+        if not hasattr(signal, "SIGHUP"):
+            return
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGHUP, EnvLoadUtil.reload)
+        except (NotImplementedError, RuntimeError) as e:
+            logger.warning(f"Cannot install SIGHUP reload handler: {str(e)}")
+
+    @staticmethod
+    def settings() -> Settings:
+        if EnvLoadUtil._settings is None:
+            EnvLoadUtil._ensure_loaded()
+        return EnvLoadUtil._settings
+
     @staticmethod
     def load_env(key: str, default: str = None):
-        dotenv.load_dotenv()
-        return os.getenv(key, "") if default is None else os.getenv(key, default)
-        
+        EnvLoadUtil._ensure_loaded()
+        return EnvLoadUtil._config.get(key, "") if default is None else EnvLoadUtil._config.get(key, default)
+
     @staticmethod
     def get_env_config_dict() -> dict:
-        dotenv.load_dotenv()
-        config = {}
-        for key, value in os.environ.items():
-            config[key] = value
-
-        return config
-    
\ No newline at end of file
+        EnvLoadUtil._ensure_loaded()
+        return dict(EnvLoadUtil._config)
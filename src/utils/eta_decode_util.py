@@ -0,0 +1,95 @@
+# pylint: disable=W0603,E0402,W1203
+import sys
+import json
+import logging
+
+from models.kmb.stop_eta.kmb_stop_eta import KMBStopETAResponse
+
+logger = logging.getLogger(__name__)
+
+_intern = sys.intern
+
+
+class EtaRow:
+    """
+    One ETA row with the same attribute names as StopETAData, without pydantic.
+
+    Strings that repeat across rows and stops (company, route, direction, destinations)
+    are interned so cached feeds share them.
+    """
+
+    __slots__ = ("co", "route", "dir", "service_type", "seq", "dest_tc", "dest_sc", "dest_en", "eta_seq", "eta",
+                 "rmk_tc", "rmk_sc", "rmk_en", "data_timestamp")
+
+    def __init__(self, row: dict):
+        self.co = _intern(row["co"])
+        self.route = _intern(row["route"])
+        self.dir = _intern(row["dir"])
+        self.service_type = int(row["service_type"])
+        self.seq = int(row["seq"])
+        self.dest_tc = _intern(row["dest_tc"])
+        self.dest_sc = _intern(row["dest_sc"])
+        self.dest_en = _intern(row["dest_en"])
+        self.eta_seq = int(row["eta_seq"])
+        self.eta = row.get("eta")
+        self.rmk_tc = row["rmk_tc"]
+        self.rmk_sc = row["rmk_sc"]
+        self.rmk_en = row["rmk_en"]
+        self.data_timestamp = row["data_timestamp"]
+
+    def as_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.__slots__}
+
+
+class EtaFeed:
+    """Drop-in for KMBStopETAResponse on the read path; call `validate()` for the pydantic model."""
+
+    __slots__ = ("type", "version", "generated_timestamp", "data")
+
+    def __init__(self, type: str, version: str, generated_timestamp: str, data: list[EtaRow]):  # pylint: disable=W0622
+        self.type = type
+        self.version = version
+        self.generated_timestamp = generated_timestamp
+        self.data = data
+
+    def validate(self) -> KMBStopETAResponse:
+        return KMBStopETAResponse(
+            type=self.type,
+            version=self.version,
+            generated_timestamp=self.generated_timestamp,
+            data=[row.as_dict() for row in self.data],
+        )
+
+
+class EtaDecodeUtil:
+
+    @staticmethod
+    def decode(content: bytes, route: str = None) -> EtaFeed:
+        """
+        Decode a raw stop-eta or route-eta payload into an EtaFeed.
+
+        With `route`, rows for other routes are skipped before any object is built.
+        Payloads that do not match the expected shape are handed to pydantic, so a
+        schema change still surfaces as a ValidationError naming the bad field.
+        """
+        payload = json.loads(content)
+        try:
+            rows = payload["data"]
+            if route is not None:
+                rows = [row for row in rows if row["route"] == route]
+            return EtaFeed(payload["type"], payload["version"], payload["generated_timestamp"],
+                           [EtaRow(row) for row in rows])
+        except (KeyError, TypeError, ValueError):
+            logger.warning("ETA payload did not match the fast decoder, validating with pydantic")
+            response = KMBStopETAResponse(**payload)
+            if route is not None:
+                response.data = [row for row in response.data if row.route == route]
+            return response
+
+    @staticmethod
+    def decode_validated(content: bytes, route: str = None) -> KMBStopETAResponse:
+        """The original pydantic decode path."""
+        response = KMBStopETAResponse(**json.loads(content))
+        if route is not None:
+            response.data = [row for row in response.data if row.route == route]
+        return response
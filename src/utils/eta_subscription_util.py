@@ -0,0 +1,241 @@
+# pylint: disable=W0603,E0402,W1203,W0718
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from .env_load_util import EnvLoadUtil
+from .fan_out_util import FanOutUtil
+from .kmb_util import KMBRouterUtil
+
+logger = logging.getLogger(__name__)
+
+
+def _row_key(entry: dict) -> tuple:
+    return entry["route"], entry["direction"], entry["service_type"], entry["eta_seq"]
+
+
+class EtaSubscriber:
+    """One connected client: its outbound message queue and its (stop_id, route) subscriptions."""
+
+    __slots__ = ("queue", "subscriptions", "overflows")
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.subscriptions: set[tuple[str, str | None]] = set()
+        self.overflows = 0
+
+
+class EtaSubscriptionHub:
+    """
+    Shares one upstream ETA poller between every WebSocket subscriber.
+
+    Clients subscribe to a stop_id, optionally narrowed to one route. While at least one
+    subscription exists, a single poller refreshes each distinct subscribed stop once per
+    `poll_interval` and pushes only the rows that changed, so upstream load follows the
+    number of distinct stops rather than the number of clients. A subscriber whose queue
+    overflows has it cleared and is sent fresh snapshots instead of the missed diffs.
+    """
+
+    def __init__(self, poll_interval: float = 15, max_stops_per_subscriber: int = 50, queue_size: int = 100,
+                 fan_out_limit: int = 8, fetch_timeout: float | None = 5):
+        self.poll_interval = poll_interval
+        self.max_stops_per_subscriber = max_stops_per_subscriber
+        self.queue_size = queue_size
+        self.fan_out_limit = fan_out_limit
+        self.fetch_timeout = fetch_timeout
+        self._subscribers: set[EtaSubscriber] = set()
+        self._stop_subscribers: dict[str, set[EtaSubscriber]] = {}
+        self._state: dict[str, dict[tuple, dict]] = {}
+        self._poller: asyncio.Task | None = None
+        self.polls = 0
+        self.upstream_fetches = 0
+        self.messages_sent = 0
+
+    def register(self) -> EtaSubscriber:
+        subscriber = EtaSubscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unregister(self, subscriber: EtaSubscriber):
+        for stop_id, route in list(subscriber.subscriptions):
+            self._remove_subscription(subscriber, stop_id, route)
+        self._subscribers.discard(subscriber)
+
+    async def subscribe(self, subscriber: EtaSubscriber, stop_id: str, route: str = None):
+        key = (stop_id, route)
+        if key in subscriber.subscriptions:
+            return
+        if len({s for s, _ in subscriber.subscriptions} | {stop_id}) > self.max_stops_per_subscriber:
+            self.push(subscriber, {
+                "type": "error",
+                "message": f"At most {self.max_stops_per_subscriber} stops per connection",
+                "stop_id": stop_id,
+                "route": route,
+            })
+            return
+
+        subscriber.subscriptions.add(key)
+        self._stop_subscribers.setdefault(stop_id, set()).add(subscriber)
+        if stop_id not in self._state:
+            cancelled = True
+            try:
+                eta_response = await KMBRouterUtil.fetch_kmb_eta_stop_by_stop_id(stop_id)
+                # Only keep state for a stop that is still subscribed once the fetch returns
+                if stop_id in self._stop_subscribers:
+                    self._state.setdefault(stop_id, self._rows(eta_response))
+                cancelled = False
+            except Exception as e:
+                cancelled = False
+                logger.error(f"Initial ETA fetch failed for subscribed stop {stop_id}: {str(e)}")
+            finally:
+                if cancelled:
+                    # The connection closed mid-fetch: undo this subscription as the task unwinds
+                    self._remove_subscription(subscriber, stop_id, route)
+            if key not in subscriber.subscriptions:
+                return
+        self.push(subscriber, self._snapshot(stop_id, route))
+        self._ensure_poller()
+
+    def unsubscribe(self, subscriber: EtaSubscriber, stop_id: str, route: str = None):
+        self._remove_subscription(subscriber, stop_id, route)
+        self.push(subscriber, {"type": "unsubscribed", "stop_id": stop_id, "route": route})
+
+    def _remove_subscription(self, subscriber: EtaSubscriber, stop_id: str, route: str | None):
+        subscriber.subscriptions.discard((stop_id, route))
+        if any(s == stop_id for s, _ in subscriber.subscriptions):
+            return
+        subscribers = self._stop_subscribers.get(stop_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._stop_subscribers[stop_id]
+            self._state.pop(stop_id, None)
+
+    @staticmethod
+    def _rows(eta_response) -> dict[tuple, dict]:
+        if not eta_response or not eta_response.data:
+            return {}
+        rows = {}
+        for eta in eta_response.data:
+            entry = KMBRouterUtil.format_eta_entry(eta)
+            rows[_row_key(entry)] = entry
+        return rows
+
+    def _snapshot(self, stop_id: str, route: str | None) -> dict:
+        rows = self._state.get(stop_id, {})
+        return {
+            "type": "snapshot",
+            "stop_id": stop_id,
+            "route": route,
+            "eta_data": [entry for entry in rows.values() if route is None or entry["route"] == route],
+            "updated_at": datetime.now(timezone.utc).isoformat(),
+        }
+
+    def push(self, subscriber: EtaSubscriber, message: dict):
+        try:
+            subscriber.queue.put_nowait(message)
+            self.messages_sent += 1
+        except asyncio.QueueFull:
+            # The client is not keeping up: drop everything queued and resend current state
+            subscriber.overflows += 1
+            logger.warning(f"ETA subscriber queue overflowed, resyncing {len(subscriber.subscriptions)} subscriptions")
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            for stop_id, route in list(subscriber.subscriptions)[:self.queue_size]:
+                subscriber.queue.put_nowait(self._snapshot(stop_id, route))
+                self.messages_sent += 1
+
+    def _ensure_poller(self):
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._run_poller())
+
+    async def _run_poller(self):
+        while self._stop_subscribers:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"ETA subscription poll failed: {str(e)}")
+        logger.info("No ETA subscriptions left, stopping poller")
+
+    async def poll_once(self):
+        stop_ids = list(self._stop_subscribers)
+        if not stop_ids:
+            return
+        self.polls += 1
+        self.upstream_fetches += len(stop_ids)
+        results = await FanOutUtil.gather_bounded(
+            stop_ids, KMBRouterUtil.refresh_kmb_eta_stop, limit=self.fan_out_limit, timeout=self.fetch_timeout
+        )
+        for stop_id, eta_response in zip(stop_ids, results):
+            if isinstance(eta_response, Exception) or eta_response is None:
+                # Keep the last known rows rather than telling clients every bus vanished
+                logger.error(f"ETA subscription refresh failed for stop {stop_id}: {str(eta_response)}")
+                continue
+            if stop_id not in self._stop_subscribers:
+                continue
+            self._apply(stop_id, self._rows(eta_response))
+
+    def _apply(self, stop_id: str, rows: dict[tuple, dict]):
+        previous = self._state.get(stop_id, {})
+        self._state[stop_id] = rows
+        upsert = [entry for key, entry in rows.items() if previous.get(key) != entry]
+        removed = [key for key in previous if key not in rows]
+        if not upsert and not removed:
+            return
+
+        for subscriber in list(self._stop_subscribers.get(stop_id, ())):
+            for sub_stop_id, route in list(subscriber.subscriptions):
+                if sub_stop_id != stop_id:
+                    continue
+                route_upsert = [entry for entry in upsert if route is None or entry["route"] == route]
+                route_removed = [key for key in removed if route is None or key[0] == route]
+                if not route_upsert and not route_removed:
+                    continue
+                self.push(subscriber, {
+                    "type": "diff",
+                    "stop_id": stop_id,
+                    "route": route,
+                    "upsert": route_upsert,
+                    "remove": [
+                        {"route": r, "direction": d, "service_type": s, "eta_seq": q}
+                        for r, d, s, q in route_removed
+                    ],
+                    "updated_at": datetime.now(timezone.utc).isoformat(),
+                })
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "subscribed_stops": len(self._stop_subscribers),
+            "poller_running": self._poller is not None and not self._poller.done(),
+            "polls": self.polls,
+            "upstream_fetches": self.upstream_fetches,
+            "messages_sent": self.messages_sent,
+            "overflows": sum(subscriber.overflows for subscriber in self._subscribers),
+        }
+
+    async def close(self):
+        if self._poller is not None and not self._poller.done():
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+        self._poller = None
+
+
+_GLOBAL_ETA_SUBSCRIPTION_HUB_INSTANCE = None
+def get_global_eta_subscription_hub() -> EtaSubscriptionHub:
+    global _GLOBAL_ETA_SUBSCRIPTION_HUB_INSTANCE
+    if _GLOBAL_ETA_SUBSCRIPTION_HUB_INSTANCE is None:
+        settings = EnvLoadUtil.settings()
+        _GLOBAL_ETA_SUBSCRIPTION_HUB_INSTANCE = EtaSubscriptionHub(
+            poll_interval=settings.eta_subscription_poll_interval,
+            max_stops_per_subscriber=settings.eta_subscription_max_stops,
+            queue_size=settings.eta_subscription_queue_size,
+            fan_out_limit=settings.kmb_eta_fan_out_limit,
+            fetch_timeout=settings.kmb_eta_fetch_timeout,
+        )
+    return _GLOBAL_ETA_SUBSCRIPTION_HUB_INSTANCE
@@ -0,0 +1,67 @@
+# pylint: disable=W0603,E0402,W1203,W0718
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class FanOutUtil:
+
+    @staticmethod
+    async def gather_bounded(items: Iterable[T], worker: Callable[[T], Awaitable[Any]],
+                             limit: int = 8, timeout: float | None = None) -> list:
+        """
+        Run `worker(item)` for every item with at most `limit` calls in flight.
+
+        Results come back in input order. A call that raises or exceeds `timeout`
+        yields its exception in place of a result, so callers always get a
+        partial result set instead of losing the whole batch.
+        """
+        items = list(items)
+        semaphore = asyncio.Semaphore(max(1, limit))
+
+        async def _run(item: T):
+            async with semaphore:
+                try:
+                    if timeout is None:
+                        return await worker(item)
+                    return await asyncio.wait_for(worker(item), timeout=timeout)
+                except asyncio.TimeoutError:
+                    return asyncio.TimeoutError(f"Timed out after {timeout}s")
+                except Exception as e:
+                    return e
+
+        return await asyncio.gather(*[_run(item) for item in items])
+
+    @staticmethod
+    async def iter_bounded(items: Iterable[T], worker: Callable[[T], Awaitable[Any]],
+                           limit: int = 8, timeout: float | None = None) -> AsyncIterator[tuple[int, Any]]:
+        """
+        Like `gather_bounded`, but yield (input_index, result) as each call finishes,
+        fastest first. Pending calls are cancelled if the consumer stops early.
+        """
+        items = list(items)
+        semaphore = asyncio.Semaphore(max(1, limit))
+
+        async def _run(index: int, item: T):
+            async with semaphore:
+                try:
+                    if timeout is None:
+                        return index, await worker(item)
+                    return index, await asyncio.wait_for(worker(item), timeout=timeout)
+                except asyncio.TimeoutError:
+                    return index, asyncio.TimeoutError(f"Timed out after {timeout}s")
+                except Exception as e:
+                    return index, e
+
+        tasks = [asyncio.create_task(_run(index, item)) for index, item in enumerate(items)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
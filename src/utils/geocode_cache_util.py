@@ -0,0 +1,183 @@
+# pylint: disable=W0603,E0402,W1203,W0718
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from .env_load_util import EnvLoadUtil
+
+logger = logging.getLogger(__name__)
+
+
+class GeocodeCache:
+    """
+    Geocode results keyed by normalized query, held in memory and persisted to SQLite.
+
+    Successful lookups are kept for `ttl` seconds, failed lookups (stored as None)
+    for the shorter `negative_ttl`. The cache is bounded to `max_size` entries and
+    evicts the least recently used entry from both memory and disk. `put()` updates
+    memory in place and hands the SQLite write to a single writer thread, so callers
+    on the event loop never wait on disk I/O.
+    """
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS geocode_cache (
+            query TEXT PRIMARY KEY,
+            lat REAL,
+            lon REAL,
+            stored_at REAL NOT NULL
+        )
+    """
+
+    def __init__(self, db_path: str | None, ttl: float = 30 * 24 * 3600, negative_ttl: float = 3600,
+                 max_size: int = 10000):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[tuple | None, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._writer: ThreadPoolExecutor | None = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        query = unicodedata.normalize("NFKC", query or "")
+        return re.sub(r"\s+", " ", query).strip().casefold()
+
+    def _connect(self) -> sqlite3.Connection | None:
+        if self._conn is None and self.db_path:
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+                self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+                self._conn.execute(self._SCHEMA)
+                self._conn.commit()
+            except Exception as e:
+                logger.error(f"Failed to open geocode cache at {self.db_path}, using memory only. Error: {str(e)}")
+                self.db_path = None
+                self._conn = None
+        return self._conn
+
+    def _is_expired(self, coords: tuple | None, stored_at: float) -> bool:
+        ttl = self.ttl if coords is not None else self.negative_ttl
+        return time.time() - stored_at > ttl
+
+    def warm(self) -> int:
+        """Load the most recently stored, unexpired entries from disk into memory."""
+        with self._db_lock:
+            conn = self._connect()
+            if conn is None:
+                return 0
+            rows = conn.execute(
+                "SELECT query, lat, lon, stored_at FROM geocode_cache ORDER BY stored_at DESC LIMIT ?",
+                (self.max_size,),
+            ).fetchall()
+        loaded = 0
+        with self._lock:
+            for query, lat, lon, stored_at in reversed(rows):
+                coords = (lat, lon) if lat is not None and lon is not None else None
+                if not self._is_expired(coords, stored_at):
+                    self._entries[query] = (coords, stored_at)
+                    loaded += 1
+        logger.info(f"Warmed geocode cache with {loaded} entries from {self.db_path}")
+        return loaded
+
+    def lookup(self, query: str) -> tuple[bool, tuple | None]:
+        """Return (found, coords). `found` is True for cached negative results too."""
+        key = self.normalize(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._is_expired(*entry):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return False, None
+
+    def contains(self, query: str) -> bool:
+        key = self.normalize(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(*entry)
+
+    def put(self, query: str, coords: tuple | None) -> Future | None:
+        """Store `coords` in memory now and queue the disk write; returns the write's future, if any."""
+        key = self.normalize(query)
+        stored_at = time.time()
+        with self._lock:
+            self._entries[key] = (coords, stored_at)
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_size:
+                evicted.append(self._entries.popitem(last=False)[0])
+            if not self.db_path:
+                return None
+            if self._writer is None:
+                # One thread keeps writes in order and off the caller's thread
+                self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="geocode-cache")
+            return self._writer.submit(self._persist, key, coords, stored_at, evicted)
+
+    def _persist(self, key: str, coords: tuple | None, stored_at: float, evicted: list[str]):
+        with self._db_lock:
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                lat, lon = coords if coords is not None else (None, None)
+                conn.execute(
+                    "INSERT OR REPLACE INTO geocode_cache (query, lat, lon, stored_at) VALUES (?, ?, ?, ?)",
+                    (key, lat, lon, stored_at),
+                )
+                if evicted:
+                    conn.executemany("DELETE FROM geocode_cache WHERE query = ?", [(k,) for k in evicted])
+                conn.commit()
+            except Exception as e:
+                logger.error(f"Failed to persist geocode for '{key}'. Error: {str(e)}")
+
+    def flush(self):
+        """Block until every queued disk write has finished."""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            writer.shutdown(wait=True)
+
+    def close(self):
+        self.flush()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_GLOBAL_GEOCODE_CACHE_INSTANCE = None
+def get_global_geocode_cache() -> GeocodeCache:
+    global _GLOBAL_GEOCODE_CACHE_INSTANCE
+    if _GLOBAL_GEOCODE_CACHE_INSTANCE is None:
+        db_path = os.path.normpath(os.path.join(
+            EnvLoadUtil.settings().base_folder, "res", EnvLoadUtil.settings().geocode_cache_file
+        ))
+        _GLOBAL_GEOCODE_CACHE_INSTANCE = GeocodeCache(
+            db_path=db_path,
+            ttl=EnvLoadUtil.settings().geocode_cache_ttl,
+            negative_ttl=EnvLoadUtil.settings().geocode_cache_negative_ttl,
+            max_size=EnvLoadUtil.settings().geocode_cache_max_size,
+        )
+    return _GLOBAL_GEOCODE_CACHE_INSTANCE
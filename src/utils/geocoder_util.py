@@ -0,0 +1,138 @@
+# pylint: disable=W0603,E0402,W1203,W0718
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from geopy.geocoders import Nominatim
+
+from .env_load_util import EnvLoadUtil
+from .geocode_cache_util import GeocodeCache, get_global_geocode_cache
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Async token bucket; waiters are served in arrival order."""
+
+    def __init__(self, rate: float = 1.0, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+
+class AsyncGeocoder:
+    """
+    Non-blocking front end for a geopy geocoder.
+
+    Lookups run on a worker thread so the event loop never blocks, are paced by a
+    global token bucket (Nominatim allows 1 req/s), and concurrent requests for the
+    same query share one pending lookup. A pending lookup is cancelled once every
+    caller waiting on it has been cancelled.
+    """
+
+    def __init__(self, geocoder=None, cache: GeocodeCache = None, rate: float = 1.0, burst: int = 1,
+                 timeout: float = 10, max_workers: int = 2):
+        self.geocoder = geocoder if geocoder is not None else Nominatim(user_agent="daily_data_assistant", timeout=timeout)
+        self.cache = cache
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate=rate, capacity=burst)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="geocoder")
+        self._pending: dict[str, list] = {}
+        self.lookups = 0
+        self.coalesced = 0
+
+    async def geocode(self, query: str) -> tuple | None:
+        """Return (lat, lon) for `query`, or None if it cannot be geocoded."""
+        if self.cache is not None:
+            found, coords = self.cache.lookup(query)
+            if found:
+                return coords
+
+        key = GeocodeCache.normalize(query)
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = [asyncio.create_task(self._lookup(query)), 0]
+            self._pending[key] = pending
+            pending[0].add_done_callback(lambda done, k=key: self._release(k, done))
+        else:
+            self.coalesced += 1
+
+        task = pending[0]
+        pending[1] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and pending[1] == 1:
+                task.cancel()
+            raise
+        finally:
+            pending[1] -= 1
+
+    def _release(self, key: str, task: asyncio.Task):
+        pending = self._pending.get(key)
+        if pending is not None and pending[0] is task:
+            del self._pending[key]
+
+    async def _lookup(self, query: str) -> tuple | None:
+        await self.bucket.acquire()
+        self.lookups += 1
+        loop = asyncio.get_running_loop()
+        try:
+            logger.info(f"Geocoding: {query}")
+            location = await loop.run_in_executor(
+                self._executor, partial(self.geocoder.geocode, query, timeout=self.timeout)
+            )
+        except Exception as e:
+            # Transient failures are not cached so the next request retries
+            logger.error(f"Geocoding failed for '{query}': {str(e)}")
+            return None
+
+        coords = (location.latitude, location.longitude) if location else None
+        logger.info(f"Geocoding result for '{query}': {coords}")
+        if self.cache is not None:
+            self.cache.put(query, coords)
+        return coords
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def stats(self) -> dict:
+        return {
+            "lookups": self.lookups,
+            "coalesced": self.coalesced,
+            "pending": len(self._pending),
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_GLOBAL_ASYNC_GEOCODER_INSTANCE = None
+def get_global_async_geocoder() -> AsyncGeocoder:
+    global _GLOBAL_ASYNC_GEOCODER_INSTANCE
+    if _GLOBAL_ASYNC_GEOCODER_INSTANCE is None:
+        _GLOBAL_ASYNC_GEOCODER_INSTANCE = AsyncGeocoder(
+            cache=get_global_geocode_cache(),
+            rate=EnvLoadUtil.settings().geocoder_rate_per_second,
+            burst=EnvLoadUtil.settings().geocoder_burst,
+            timeout=EnvLoadUtil.settings().geocoder_timeout,
+            max_workers=EnvLoadUtil.settings().geocoder_max_workers,
+        )
+    return _GLOBAL_ASYNC_GEOCODER_INSTANCE
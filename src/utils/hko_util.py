@@ -1,23 +1,53 @@
 # pylint: disable=W0603,E0402,W1203
+import os
+import json
 import asyncio
 import logging 
-from haversine import haversine, Unit
 
 
 from .env_load_util import EnvLoadUtil
 from .httpx_util import get_global_httpx_util
+from .geocoder_util import get_global_async_geocoder
+from .station_index_util import StationIndex
+from .metrics_util import timed
 from models.hko.data_type_enum import DataTypeEnum
 from models.hko.flw.hko_flw_response import HkoFLWResponse
 from models.hko.rhrread.hko_rhrread_response import HkORHRREADResponse
-from geopy.geocoders import Nominatim
+from models.hko.station.hko_station_response import WeatherStationListResponse
 
 logger = logging.getLogger(__name__)
 
 
 class HKORouterUtil:
     def __init__(self):
-        self.geolocator = Nominatim(user_agent="bus_tracker_hko")
-        self.place_coordinates_cache = {}
+        self.geocoder = get_global_async_geocoder()
+        self.station_coordinates = self.load_station_coordinates()
+
+    @staticmethod
+    def load_station_coordinates() -> dict:
+        """Map every known station name (en, tc and sc) to its bundled (lat, lon)."""
+        try:
+            file_path = os.path.normpath(os.path.join(EnvLoadUtil.settings().base_folder, "res", EnvLoadUtil.settings().hko_station_data))
+            with open(file_path, "r", encoding="utf-8") as f:
+                station_list = WeatherStationListResponse(**json.load(f))
+        except Exception as e:
+            logger.error(f"Failed to load HKO station data from file, falling back to live geocoding. Error: {str(e)}")
+            return {}
+
+        station_coordinates = {}
+        for station in station_list.data:
+            coords = (float(station.lat), float(station.long))
+            for name in (station.name_en, station.name_tc, station.name_sc):
+                station_coordinates[name] = coords
+        logger.info(f"Loaded {len(station_list.data)} HKO stations from file")
+        return station_coordinates
+
+    async def _get_station_coords(self, place_name: str) -> tuple | None:
+        coords = self.station_coordinates.get(place_name)
+        if coords is not None:
+            return coords
+        logger.warning(f"Station '{place_name}' is not in the bundled station table, geocoding it")
+        return await self._geocode_place(place_name)
 
     @staticmethod
     async def fetch_hko_flw_data(lang: str = "tc") -> HkoFLWResponse:
@@ -32,6 +62,7 @@ class HKORouterUtil:
             return None
 
     @staticmethod
+    @timed("hko_rhrread")
     async def fetch_rhrread_data(lang: str = "tc") -> HkORHRREADResponse:
         url = EnvLoadUtil.HKO_WEATHER_URL
         formatted_url = url.format(data_type=DataTypeEnum.RHRREAD.value, lang=lang)
@@ -55,32 +86,25 @@ class HKORouterUtil:
             logger.error(f"Failed to fetch HKO weather data for data_type {data_type}. Status code: {response.status_code}")
             return ""
 
-    def _geocode_place(self, place_name: str, region: str = "Hong Kong") -> tuple:
+    async def _geocode_place(self, place_name: str, region: str = "Hong Kong") -> tuple:
         """
         Geocode a place name to get its latitude and longitude.
         Returns (lat, lon) tuple or None if geocoding fails.
         """
-        # Check cache first
-        cache_key = f"{place_name}, {region}"
-        if cache_key in self.place_coordinates_cache:
-            return self.place_coordinates_cache[cache_key]
-        
         try:
             # Geocode with region context for better accuracy
-            location = self.geolocator.geocode(f"{place_name}, {region}", timeout=10)
-            if location:
-                coords = (location.latitude, location.longitude)
-                self.place_coordinates_cache[cache_key] = coords
+            coords = await self.geocoder.geocode(f"{place_name}, {region}")
+            if coords:
                 logger.info(f"Geocoded '{place_name}': {coords}")
-                return coords
             else:
                 logger.warning(f"Could not geocode place: {place_name}")
-                return None
+            return coords
         except Exception as e:
             logger.error(f"Geocoding error for '{place_name}': {str(e)}")
             return None
 
-    async def find_nearby_weather_stations(self, address: str, lang: str = "tc", top_n: int = 5) -> dict:
+    async def find_nearby_weather_stations(self, address: str, lang: str = "tc", top_n: int = 5,
+                                           user_coords: tuple | None = None) -> dict:
         """
         Find the nearest weather stations to a given address.
         
@@ -88,6 +112,7 @@ class HKORouterUtil:
             address: User input address
             lang: Language for API request (default: "tc")
             top_n: Number of nearest stations to return (default: 5)
+            user_coords: Pre-computed (lat, lon) of the address, skips geocoding it
             
         Returns:
             Dictionary containing the nearby weather stations and their data
@@ -100,50 +125,25 @@ class HKORouterUtil:
             logger.error("Failed to fetch RHRREAD data")
             return {"error": "Failed to fetch weather data"}
         
-        # Step 2: Extract all temperature station locations and geocode them
-        logger.info("Extracting and geocoding temperature station locations...")
-        stations_with_coords = []
-        
-        for temp_data in rhrread_data.temperature.data:
-            cache_key = f"{temp_data.place}, Hong Kong"
-            if cache_key not in self.place_coordinates_cache:
-                await asyncio.sleep(1.1)
-            coords = self._geocode_place(temp_data.place)
-            if coords:
-                stations_with_coords.append({
-                    "place": temp_data.place,
-                    "value": temp_data.value,
-                    "unit": temp_data.unit,
-                    "lat": coords[0],
-                    "lon": coords[1]
-                })
-        
+        # Step 2: Resolve all temperature station locations
+        stations_with_coords = await self._resolve_stations(rhrread_data)
         if not stations_with_coords:
             logger.error("No stations could be geocoded")
             return {"error": "Could not geocode weather stations"}
         
-        logger.info(f"Successfully geocoded {len(stations_with_coords)} stations")
-        
+        # Step 3: Resolve the user address
         if user_coords:
             logger.info(f"Using pre-computed coordinates for '{address}': {user_coords}")
         else:
             logger.info(f"Geocoding user address: {address}")
-            user_coords = self._geocode_place(address, region="Hong Kong")
+            user_coords = await self._geocode_place(address, region="Hong Kong")
             if not user_coords:
                 logger.error(f"Could not geocode user address: {address}")
                 return {"error": f"Could not geocode address: {address}"}
             logger.info(f"User address geocoded to: {user_coords}")
-        # Step 4: Haversine
-        logger.info("Calculating distances to all weather stations...")
-        for station in stations_with_coords:
-            station_coords = (station["lat"], station["lon"])
-            distance = haversine(user_coords, station_coords, unit=Unit.METERS)
-            station["distance_km"] = round(distance, 2)
-        
-        # Step 5: Sort by distance and get top N nearest stations
-        stations_with_coords.sort(key=lambda x: x["distance_km"])
-        nearby_stations = stations_with_coords[:top_n]
-        
+
+        # Step 4: Vectorized haversine + top N
+        nearby_stations = self._rank_stations(stations_with_coords, [user_coords], top_n)[0]
         logger.info(f"Found {len(nearby_stations)} nearby stations")
         
         return {
@@ -155,6 +155,65 @@ class HKORouterUtil:
             "record_time": rhrread_data.temperature.recordTime,
             "nearby_stations": nearby_stations
         }
+
+    async def find_nearby_weather_stations_batch(self, coordinates: list[tuple], lang: str = "tc", top_n: int = 5) -> dict:
+        """
+        Find the nearest weather stations for many (lat, lon) points with one RHRREAD
+        fetch and one distance computation, e.g. to precompute weather for every bus stop.
+        """
+        rhrread_data = await self.fetch_rhrread_data(lang=lang)
+        if not rhrread_data:
+            logger.error("Failed to fetch RHRREAD data")
+            return {"error": "Failed to fetch weather data"}
+
+        stations_with_coords = await self._resolve_stations(rhrread_data)
+        if not stations_with_coords:
+            logger.error("No stations could be geocoded")
+            return {"error": "Could not geocode weather stations"}
+
+        ranked = self._rank_stations(stations_with_coords, coordinates, top_n) if coordinates else []
+        return {
+            "record_time": rhrread_data.temperature.recordTime,
+            "results": [
+                {
+                    "user_coordinates": {"lat": coords[0], "lon": coords[1]},
+                    "nearby_stations": nearby_stations,
+                }
+                for coords, nearby_stations in zip(coordinates, ranked)
+            ],
+        }
+
+    async def _resolve_stations(self, rhrread_data: HkORHRREADResponse) -> list[dict]:
+        logger.info("Resolving temperature station locations...")
+        # Known stations come from the bundled table; only unknown ones hit the geocoder
+        temperature_data = rhrread_data.temperature.data
+        station_coords = await asyncio.gather(*[self._get_station_coords(t.place) for t in temperature_data])
+        stations_with_coords = [
+            {
+                "place": temp_data.place,
+                "value": temp_data.value,
+                "unit": temp_data.unit,
+                "lat": coords[0],
+                "lon": coords[1]
+            }
+            for temp_data, coords in zip(temperature_data, station_coords)
+            if coords
+        ]
+        logger.info(f"Successfully located {len(stations_with_coords)} stations")
+        return stations_with_coords
+
+    @staticmethod
+    def _rank_stations(stations_with_coords: list[dict], coordinates: list[tuple], top_n: int) -> list[list[dict]]:
+        """For each (lat, lon) in `coordinates`, return the `top_n` nearest stations with their distance."""
+        index = StationIndex([s["lat"] for s in stations_with_coords], [s["lon"] for s in stations_with_coords])
+        indices, distances = index.nearest_batch([c[0] for c in coordinates], [c[1] for c in coordinates], top_n=top_n)
+        return [
+            [
+                {**stations_with_coords[i], "distance_km": round(float(d), 2)}
+                for i, d in zip(row_indices, row_distances)
+            ]
+            for row_indices, row_distances in zip(indices, distances)
+        ]
         
 _GLOBAL_HKO_ROUTER_UTIL_INSTANCE = None
 def get_global_hko_router_util() -> HKORouterUtil:
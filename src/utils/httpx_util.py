@@ -1,37 +1,99 @@
-# pylint: disable=W0603,E0402
+# pylint: disable=W0603,E0402,W1203
+import asyncio
+import logging
 
 import httpx
-from .env_load_util import EnvLoadUtil 
+from .env_load_util import EnvLoadUtil
+from .single_flight_util import SingleFlight
+
+logger = logging.getLogger(__name__)
+
 
 class HttpxUtil:
 
-    def __init__(self, timeout: int = 60):
+    def __init__(self, timeout: int = 60, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, per_host_limit: int = 10, http2: bool = True,
+                 transport: httpx.AsyncBaseTransport = None):
         self.timeout = timeout
-        self.client = httpx.AsyncClient(timeout=self.timeout)
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.per_host_limit = per_host_limit
+        self.http2 = http2
+        self.transport = transport
+        self.client: httpx.AsyncClient = None
+        self._host_semaphores: dict[str, asyncio.Semaphore] = {}
+        self.single_flight = SingleFlight(name="httpx_get")
+
+    def _build_client(self) -> httpx.AsyncClient:
+        kwargs = {"timeout": self.timeout, "limits": self.limits, "transport": self.transport}
+        if self.http2 and self.transport is None:
+            try:
+                return httpx.AsyncClient(http2=True, **kwargs)
+            except ImportError:
+                logger.warning("HTTP/2 requested but the 'h2' package is not installed, falling back to HTTP/1.1")
+        return httpx.AsyncClient(**kwargs)
+
+    async def open(self):
+        if self.client is None or self.client.is_closed:
+            self.client = self._build_client()
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Lazily open so code paths outside the app lifespan (scripts, REPL) still work
+        if self.client is None or self.client.is_closed:
+            self.client = self._build_client()
+        return self.client
+
+    def _get_host_semaphore(self, url: str) -> asyncio.Semaphore:
+        host = httpx.URL(url).host
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
 
     async def post(self, url: str, data: dict = None, headers: dict = None) -> httpx.Response:
-        response = await self.client.post(url, json=data, headers=headers)
+        async with self._get_host_semaphore(url):
+            response = await self._get_client().post(url, json=data, headers=headers)
         return response
-    
+
     async def get_all(self, url: str) -> httpx.Response:
-        response = await self._get(url, params=None, headers=None)
+        # Concurrent GETs for the same URL share one upstream request
+        response = await self.single_flight.do(url, lambda: self._get(url, params=None, headers=None))
         return response
 
-    async def _get(self, url: str, params: dict = None, headers: dict = None) -> httpx.Response:
-        response: httpx.Response = None
-        if params is None or headers is None:
-            response = await self.client.get(url)
-        response = await self.client.get(url, params=params, headers=headers)
+    async def get(self, url: str, params: dict = None, headers: dict = None, timeout: float = None) -> httpx.Response:
+        return await self._get(url, params=params, headers=headers, timeout=timeout)
+
+    async def _get(self, url: str, params: dict = None, headers: dict = None, timeout: float = None) -> httpx.Response:
+        kwargs = {"params": params, "headers": headers}
+        if timeout is not None:
+            kwargs["timeout"] = timeout
+        async with self._get_host_semaphore(url):
+            response = await self._get_client().get(url, **kwargs)
         return response
-    
+
+    def get_single_flight_stats(self) -> dict:
+        return self.single_flight.stats()
+
     async def close(self):
-        await self.client.aclose()
+        if self.client is not None and not self.client.is_closed:
+            await self.client.aclose()
+        self.client = None
 
 
 _GOLBAL_HTTPX_UTIL_INSTANCE = None
 def get_global_httpx_util() -> HttpxUtil:
     global _GOLBAL_HTTPX_UTIL_INSTANCE
     if _GOLBAL_HTTPX_UTIL_INSTANCE is None:
-        timeout = int(EnvLoadUtil.load_env("DEFAULT_HTTPX_TIMEOUT", 60))
-        _GOLBAL_HTTPX_UTIL_INSTANCE = HttpxUtil(timeout=timeout)
-    return _GOLBAL_HTTPX_UTIL_INSTANCE
\ No newline at end of file
+        _GOLBAL_HTTPX_UTIL_INSTANCE = HttpxUtil(
+            timeout=EnvLoadUtil.settings().default_httpx_timeout,
+            max_connections=EnvLoadUtil.settings().httpx_max_connections,
+            max_keepalive_connections=EnvLoadUtil.settings().httpx_max_keepalive_connections,
+            keepalive_expiry=EnvLoadUtil.settings().httpx_keepalive_expiry,
+            per_host_limit=EnvLoadUtil.settings().httpx_per_host_limit,
+            http2=EnvLoadUtil.settings().httpx_http2,
+        )
+    return _GOLBAL_HTTPX_UTIL_INSTANCE
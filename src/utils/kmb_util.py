@@ -1,20 +1,29 @@
 # pylint: disable=W0603,E0402,W1203
 import os 
+import asyncio
 import logging 
 import json 
-from scipy.spatial import KDTree
-import numpy as np
-
-from geopy.geocoders import Nominatim
 
 from .env_load_util import EnvLoadUtil
 from .httpx_util import get_global_httpx_util
+from .cache_util import TTLCache
+from .fan_out_util import FanOutUtil
+from .geocoder_util import get_global_async_geocoder
+from .stop_index_util import StopIndex
+from .catalog_snapshot_util import CatalogSnapshotUtil
+from .route_index_util import RouteIndex
+from .route_stop_index_util import RouteStopIndex
+from .eta_decode_util import EtaDecodeUtil
+from .lang_view_util import CatalogLangViews, LangViewUtil
+from .catalog_response_util import CatalogResponseCache
+from .metrics_util import timed, stage_timer
 
 
 
 from models.kmb.stop_eta.kmb_stop_eta import KMBStopETAResponse
 from models.kmb.stop.stop_response import StopListResponse
 from models.kmb.router.route_lane import KMBRouterResponse
+from models.kmb.route_stop.route_stop_response import RouteStopListResponse
 
 logger = logging.getLogger(__name__)
 
@@ -22,38 +31,353 @@ class KMBRouterUtil:
 
     def __init__(self):
         self._stop_cache = {
-            "tree": None,
+            "index": None,
             "stops": None,
+            "views": None,
+            "digest": None,
+        }
+        self._route_cache = {
+            "routes": None,
+            "index": None,
+            "views": None,
+            "digest": None,
         }
+        self._route_stop_cache = {
+            "index": None,
+        }
+        self._route_stop_task: asyncio.Task | None = None
+        # Routes the per-route endpoint had no stops for; retried once new bulk data is indexed
+        self._route_stop_misses: set[str] = set()
+        self._catalog_from_snapshot = False
+        self._eta_cache = TTLCache(
+            ttl=EnvLoadUtil.settings().kmb_eta_cache_ttl,
+            stale_ttl=EnvLoadUtil.settings().kmb_eta_cache_stale_ttl,
+            max_size=EnvLoadUtil.settings().kmb_eta_cache_max_size,
+            name="kmb_stop_eta",
+        )
+        self._route_eta_cache = TTLCache(
+            ttl=EnvLoadUtil.settings().kmb_eta_cache_ttl,
+            stale_ttl=EnvLoadUtil.settings().kmb_eta_cache_stale_ttl,
+            max_size=EnvLoadUtil.settings().kmb_route_eta_cache_max_size,
+            name="kmb_route_eta",
+        )
 
     def _reset_cache(self):
-        self._stop_cache["tree"] = None
-        self._stop_cache["stops"] = None
+        self._stop_cache = {"index": None, "stops": None, "views": None, "digest": None}
+        self._route_cache = {"routes": None, "index": None, "views": None, "digest": None}
+        self._route_stop_cache = {"index": None}
+
+    @staticmethod
+    def _lang_views(items, project) -> CatalogLangViews | None:
+        # Snapshot rows are materialized per hit, so project those on the fly instead of all up front
+        return CatalogLangViews(items, project) if isinstance(items, list) else None
+
+    def set_stop_cache(self, stop_list: StopListResponse, index: StopIndex = None, digest: str = None):
+        if index is None:
+            index = KMBRouterUtil._build_stop_index(stop_list)
+        # Swap in a new dict so readers never see stops and index from different catalogs
+        self._stop_cache = {
+            "index": index,
+            "stops": stop_list,
+            "views": KMBRouterUtil._lang_views(stop_list.data, LangViewUtil.project_stop),
+            "digest": digest,
+        }
+
+    def set_route_cache(self, route_list: KMBRouterResponse, digest: str = None):
+        self._route_cache = {
+            "routes": route_list,
+            "index": RouteIndex(route_list),
+            "views": KMBRouterUtil._lang_views(route_list.data, LangViewUtil.project_route),
+            "digest": digest,
+        }
+
+    def get_catalog_digest(self, kind: str) -> str | None:
+        """Content digest of the current "stops" or "routes" catalog, computed once per catalog."""
+        cache = self._stop_cache if kind == "stops" else self._route_cache
+        if cache[kind] is None:
+            return None
+        if cache["digest"] is None:
+            cache["digest"] = CatalogResponseCache.catalog_digest(cache[kind])
+        return cache["digest"]
+
+    def project_stops(self, stops: list, lang: str) -> list[dict]:
+        """Single-language dicts for `stops`, served from the current catalog's precomputed view."""
+        views = self._stop_cache["views"]
+        if views is None:
+            return [LangViewUtil.project_stop(stop, lang) for stop in stops]
+        return views.project(stops, lang)
+
+    def project_routes(self, lanes: list, lang: str) -> list[dict]:
+        views = self._route_cache["views"]
+        if views is None:
+            return [LangViewUtil.project_route(lane, lang) for lane in lanes]
+        return views.project(lanes, lang)
+
+    @staticmethod
+    def _build_stop_index(stop_list: StopListResponse) -> StopIndex:
+        return StopIndex(
+            [float(stop.lat) for stop in stop_list.data],
+            [float(stop.long) for stop in stop_list.data],
+        )
+
+    @staticmethod
+    def _parse_stop_catalog(content: bytes) -> tuple[StopListResponse, StopIndex]:
+        stop_list = StopListResponse.model_validate_json(content)
+        return stop_list, KMBRouterUtil._build_stop_index(stop_list)
+
+    def load_stop_cache_from_snapshot(self) -> bool:
+        """Fill the stop and route caches from the compiled catalog snapshot, reusing its prebuilt index."""
+        snapshot = CatalogSnapshotUtil.load()
+        if snapshot is None:
+            return False
+        stop_list = snapshot.stop_list()
+        self.set_stop_cache(stop_list, snapshot.stop_index(), snapshot.stop_digest())
+        self.set_route_cache(snapshot.route_list(), snapshot.route_digest())
+        self._catalog_from_snapshot = True
+        logger.info(f"Loaded KMB catalog from snapshot. Total stops: {len(stop_list.data)}")
+        return True
+
+    async def warm_up(self):
+        """Load stops and routes before serving traffic: snapshot first, then upstream, then the bundled files."""
+        if not self.load_stop_cache_from_snapshot():
+            try:
+                await self.fetch_kmb_stop()
+            except Exception as e:
+                logger.error(f"Failed to fetch KMB stop data during warm-up, loading from file. Error: {str(e)}")
+            if self._stop_cache["stops"] is None:
+                stop_list = await KMBRouterUtil.load_stop_data_from_file(use_snapshot=False)
+                if stop_list is not None and stop_list.data:
+                    self.set_stop_cache(stop_list)
+            try:
+                await self.fetch_all_kmb_router()
+            except Exception as e:
+                logger.error(f"Failed to fetch KMB router data during warm-up, loading from file. Error: {str(e)}")
+            if self._route_cache["routes"] is None:
+                route_list = await KMBRouterUtil.load_kmb_router_data_from_file(use_snapshot=False)
+                if route_list is not None:
+                    self.set_route_cache(route_list)
+        # Route-stop sequences are only an optimisation, so a cold download must not delay startup
+        if not await self.load_route_stop_cache_from_file():
+            self._route_stop_task = asyncio.create_task(self.fetch_kmb_route_stops())
+
+    async def close(self):
+        """Cancel the background route-stop download if it is still running."""
+        if self._route_stop_task is not None and not self._route_stop_task.done():
+            self._route_stop_task.cancel()
+            try:
+                await self._route_stop_task
+            except asyncio.CancelledError:
+                pass
+        self._route_stop_task = None
+
+    async def refresh_catalog(self):
+        """Re-download stops and routes, parse and index them off-thread, then swap them in."""
+        httpx_util = get_global_httpx_util()
+        response = await httpx_util.get_all(EnvLoadUtil.KMB_STOP_URL)
+        if response.status_code == 200:
+            stop_list, index = await asyncio.to_thread(KMBRouterUtil._parse_stop_catalog, response.content)
+            self.set_stop_cache(stop_list, index)
+            self._catalog_from_snapshot = False
+            logger.info(f"Refreshed KMB stop catalog. Total stops: {len(stop_list.data)}")
+        else:
+            logger.error(f"Failed to refresh KMB stop catalog. Status code: {response.status_code}")
+
+        response = await httpx_util.get_all(EnvLoadUtil.ALL_KMB_ROUTER_URL)
+        if response.status_code == 200:
+            route_list = await asyncio.to_thread(KMBRouterResponse.model_validate_json, response.content)
+            self.set_route_cache(route_list)
+            logger.info(f"Refreshed KMB route catalog. Total routes: {len(route_list.data)}")
+        else:
+            logger.error(f"Failed to refresh KMB route catalog. Status code: {response.status_code}")
+
+        await self.fetch_kmb_route_stops()
+
+    @staticmethod
+    def _get_route_stop_file_path() -> str:
+        return os.path.normpath(os.path.join(
+            EnvLoadUtil.settings().base_folder, "res", EnvLoadUtil.settings().kmb_route_stop_data
+        ))
+
+    @staticmethod
+    def _parse_route_stop_catalog(content: bytes) -> RouteStopIndex:
+        return RouteStopIndex(RouteStopListResponse.model_validate_json(content))
+
+    @staticmethod
+    def _write_route_stop_file(content: bytes):
+        file_path = KMBRouterUtil._get_route_stop_file_path()
+        tmp_path = f"{file_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, file_path)
+
+    async def load_route_stop_cache_from_file(self) -> bool:
+        file_path = self._get_route_stop_file_path()
+        if not os.path.isfile(file_path):
+            return False
+        try:
+            with open(file_path, "rb") as f:
+                content = f.read()
+            index = await asyncio.to_thread(KMBRouterUtil._parse_route_stop_catalog, content)
+        except Exception as e:
+            logger.error(f"Failed to load KMB route-stop data from file. Error: {str(e)}")
+            return False
+        self._route_stop_cache = {"index": index}
+        self._route_stop_misses = set()
+        logger.info(f"Loaded KMB route-stop data from file. Total entries: {len(index)}")
+        return True
+
+    async def fetch_kmb_route_stops(self) -> RouteStopIndex | None:
+        """Download every route's stop sequence in one bulk call, cache it to disk and index it."""
+        try:
+            response = await get_global_httpx_util().get_all(EnvLoadUtil.ALL_KMB_ROUTE_STOP_URL)
+            if response.status_code != 200:
+                logger.error(f"Failed to fetch KMB route-stop data. Status code: {response.status_code}")
+                return None
+            index = await asyncio.to_thread(KMBRouterUtil._parse_route_stop_catalog, response.content)
+            await asyncio.to_thread(KMBRouterUtil._write_route_stop_file, response.content)
+        except Exception as e:
+            logger.error(f"Failed to ingest KMB route-stop data. Error: {str(e)}")
+            return None
+        self._route_stop_cache = {"index": index}
+        self._route_stop_misses = set()
+        logger.info(f"Fetched KMB route-stop data. Total entries: {len(index)}")
+        return index
 
-    def set_stop_cache(self, stop_list: StopListResponse):
-        self._stop_cache["stops"] = stop_list
-        coordinates = np.array([[float(stop.lat), float(stop.long)] for stop in stop_list.data])
-        self._stop_cache["tree"] = KDTree(coordinates)
+    async def fetch_kmb_route_stops_for_route(self, route: str, bound: str, service_type: str) -> list[str]:
+        """Fetch one route's stop sequence and merge it into the index, e.g. for a route newer than the bulk file."""
+        direction = "outbound" if bound.upper() == "O" else "inbound"
+        url = EnvLoadUtil.KMB_ETA_ROUTE_URL.format(route=route, direction=direction, service_type=service_type)
+        response = await get_global_httpx_util().get_all(url)
+        if response.status_code != 200:
+            logger.error(f"Failed to fetch route-stop data for route {route}. Status code: {response.status_code}")
+            return []
+        route_stops = RouteStopListResponse.model_validate_json(response.content)
+        index = self._route_stop_cache["index"]
+        if index is None:
+            index = RouteStopIndex()
+            self._route_stop_cache = {"index": index}
+        index.add(route_stops.data)
+        return index.stops_for_route(route, bound, service_type)
+
+    def get_route_stop_index(self) -> RouteStopIndex | None:
+        return self._route_stop_cache["index"]
+
+    async def ensure_route_stops(self, route: str) -> bool:
+        """
+        Make sure `route`'s stop sequences are indexed, fetching each of its lanes from the
+        per-route endpoint when the bulk route-stop data does not cover it (e.g. a new route).
+        """
+        index = self.get_route_stop_index()
+        if index is not None and index.has_route(route):
+            return True
+        route_index = self._route_cache["index"]
+        lanes = route_index.get(route) if route_index is not None else []
+        if not lanes or RouteIndex.normalize(route) in self._route_stop_misses:
+            return False
+        results = await asyncio.gather(
+            *[self.fetch_kmb_route_stops_for_route(lane.route, lane.bound, lane.service_type) for lane in lanes],
+            return_exceptions=True,
+        )
+        failed = False
+        for lane, result in zip(lanes, results):
+            if isinstance(result, Exception):
+                failed = True
+                logger.error(f"Failed to fetch route-stop data for route {lane.route} {lane.bound}. Error: {str(result)}")
+        index = self.get_route_stop_index()
+        if index is not None and index.has_route(route):
+            return True
+        if not failed:
+            self._route_stop_misses.add(RouteIndex.normalize(route))
+        return False
+
+    @staticmethod
+    async def filter_stops_by_route(stops: list, route: str) -> list:
+        """Drop stops the route never serves. Without route-stop data for the route, keep every stop."""
+        if not route:
+            return stops
+        util_instance = get_global_kmb_util()
+        if not await util_instance.ensure_route_stops(route):
+            return stops
+        index = util_instance.get_route_stop_index()
+        return [stop for stop in stops if index.serves(stop.stop, route)]
+
+    async def run_catalog_refresher(self, interval: float):
+        # A snapshot is only as fresh as its last build, so replace it right away instead of after one interval
+        refresh_now = self._catalog_from_snapshot
+        while True:
+            if not refresh_now:
+                await asyncio.sleep(interval)
+            refresh_now = False
+            try:
+                await self.refresh_catalog()
+            except Exception as e:
+                logger.error(f"KMB catalog refresh failed: {str(e)}")
 
     def get_cached_stop_dict(self) -> dict:
         return self._stop_cache
 
+    def get_eta_cache_stats(self) -> dict:
+        return {
+            "stop_eta": self._eta_cache.stats(),
+            "route_eta": self._route_eta_cache.stats(),
+        }
+
     @staticmethod
     async def fetch_all_kmb_router() -> KMBRouterResponse:
         url = EnvLoadUtil.ALL_KMB_ROUTER_URL
         httpx_util = get_global_httpx_util()
         response = await httpx_util.get_all(url)
         try:
-            return KMBRouterResponse.model_validate(response.json())
+            router_data = await asyncio.to_thread(KMBRouterResponse.model_validate_json, response.content)
         except Exception:
             logger.error(f"Failed to parse KMB router data. Status code: {response.status_code}. Loading from file.")
-            return await KMBRouterUtil.load_kmb_router_data_from_file()
+            router_data = await KMBRouterUtil.load_kmb_router_data_from_file()
+        if router_data is not None:
+            get_global_kmb_util().set_route_cache(router_data)
+        return router_data
+
+    @staticmethod
+    async def get_kmb_route_index() -> RouteIndex | None:
+        util_instance = get_global_kmb_util()
+        if util_instance._route_cache["index"] is None:
+            await KMBRouterUtil.fetch_all_kmb_router()
+        return util_instance._route_cache["index"]
+
+    @staticmethod
+    async def get_route_catalog_digest() -> str | None:
+        if await KMBRouterUtil.get_kmb_route_index() is None:
+            return None
+        return get_global_kmb_util().get_catalog_digest("routes")
+
+    @staticmethod
+    async def find_kmb_routes(route_id: str, bound: str = None, service_type: str = None,
+                              prefix: bool = False) -> KMBRouterResponse | None:
+        """Return only the lanes matching `route_id`, exactly or as a prefix, in the catalog envelope."""
+        route_index = await KMBRouterUtil.get_kmb_route_index()
+        if route_index is None:
+            return None
+        if prefix:
+            lanes = route_index.search_prefix(route_id)
+        else:
+            lanes = route_index.get(route_id, bound=bound, service_type=service_type)
+        route_list = route_index.route_list
+        return KMBRouterResponse.model_construct(
+            type=route_list.type,
+            version=route_list.version,
+            generated_timestamp=route_list.generated_timestamp,
+            data=lanes,
+        )
 
         
     @staticmethod
-    async def load_kmb_router_data_from_file() -> KMBRouterResponse:
+    async def load_kmb_router_data_from_file(use_snapshot: bool = True) -> KMBRouterResponse:
+        snapshot = CatalogSnapshotUtil.load() if use_snapshot else None
+        if snapshot is not None:
+            router_data = snapshot.route_list()
+            logger.info(f"Successfully loaded KMB router data from snapshot. Total routes: {len(router_data.data)}")
+            return router_data
         try:
-            file_path = os.path.normpath(os.path.join(EnvLoadUtil.load_env("BASE_FOLDER"), "res", EnvLoadUtil.load_env("KMB_ROUTE_DATA")))
+            file_path = os.path.normpath(os.path.join(EnvLoadUtil.settings().base_folder, "res", EnvLoadUtil.settings().kmb_route_data))
             with open(file_path, "r", encoding="utf-8") as f:
                 router_data = KMBRouterResponse(**json.load(f))
                 logger.info(f"Successfully loaded KMB router data from file. Total routes: {len(router_data.data)}")
@@ -63,15 +387,170 @@ class KMBRouterUtil:
             return None
         
     @staticmethod
+    @timed("kmb_eta_stop")
     async def fetch_kmb_eta_stop_by_stop_id(stop_id: str) -> KMBStopETAResponse:
+        util_instance = get_global_kmb_util()
+        return await util_instance._eta_cache.get_or_fetch(
+            stop_id, lambda: KMBRouterUtil._fetch_kmb_eta_stop_from_upstream(stop_id)
+        )
+
+    @staticmethod
+    async def refresh_kmb_eta_stop(stop_id: str) -> KMBStopETAResponse:
+        """Fetch a stop's ETA from upstream regardless of cache age and store it in the ETA cache."""
+        eta_response = await KMBRouterUtil._fetch_kmb_eta_stop_from_upstream(stop_id)
+        if eta_response is not None:
+            get_global_kmb_util()._eta_cache.set(stop_id, eta_response)
+        return eta_response
+
+    @staticmethod
+    async def fetch_kmb_eta_for_stops(stops: list, route_filter: str = None) -> list:
+        """
+        Fetch ETAs for many stops concurrently with bounded fan-out.
+        Returns one entry per stop, in order: a KMBStopETAResponse, None, or the exception raised.
+
+        With `route_filter`, the route's own ETA feed is fetched once and joined to the
+        stops locally; if that is not possible the per-stop feed is used instead.
+        """
+        if route_filter is not None and EnvLoadUtil.settings().kmb_route_eta_mode:
+            try:
+                eta_responses = await KMBRouterUtil.fetch_kmb_eta_for_stops_by_route(stops, route_filter)
+                if eta_responses is not None:
+                    return eta_responses
+            except Exception as e:
+                logger.warning(f"Route ETA fetch failed for route {route_filter}, falling back to stop ETAs: {str(e)}")
+        return await FanOutUtil.gather_bounded(
+            stops,
+            lambda stop: KMBRouterUtil.fetch_kmb_eta_stop_by_stop_id(stop.stop),
+            limit=EnvLoadUtil.settings().kmb_eta_fan_out_limit,
+            timeout=EnvLoadUtil.settings().kmb_eta_fetch_timeout,
+        )
+
+    @staticmethod
+    def format_eta_entry(eta, lang: str = None) -> dict:
+        """Client-facing dict for one ETA row, shared by every ETA response. `lang` keeps one language only."""
+        if lang is not None:
+            return {
+                "route": eta.route,
+                "destination": getattr(eta, f"dest_{lang}"),
+                "eta": eta.eta,
+                "eta_seq": eta.eta_seq,
+                "direction": eta.dir,
+                "service_type": eta.service_type,
+                "remarks": getattr(eta, f"rmk_{lang}"),
+            }
+        return {
+            "route": eta.route,
+            "destination_en": eta.dest_en,
+            "destination_tc": eta.dest_tc,
+            "destination_sc": eta.dest_sc,
+            "eta": eta.eta,
+            "eta_seq": eta.eta_seq,
+            "direction": eta.dir,
+            "service_type": eta.service_type,
+            "remarks_en": eta.rmk_en,
+            "remarks_tc": eta.rmk_tc,
+            "remarks_sc": eta.rmk_sc,
+        }
+
+    @staticmethod
+    async def iter_kmb_eta_for_stops(stops: list, route_filter: str = None):
+        """
+        Yield (stop, result) pairs as each stop's ETA arrives, fastest first. Results
+        follow `fetch_kmb_eta_for_stops`; a route-mode join yields every stop at once.
+        """
+        if route_filter is not None and EnvLoadUtil.settings().kmb_route_eta_mode:
+            try:
+                eta_responses = await KMBRouterUtil.fetch_kmb_eta_for_stops_by_route(stops, route_filter)
+            except Exception as e:
+                logger.warning(f"Route ETA fetch failed for route {route_filter}, falling back to stop ETAs: {str(e)}")
+                eta_responses = None
+            if eta_responses is not None:
+                for stop, eta_response in zip(stops, eta_responses):
+                    yield stop, eta_response
+                return
+        async for index, eta_response in FanOutUtil.iter_bounded(
+            stops,
+            lambda stop: KMBRouterUtil.fetch_kmb_eta_stop_by_stop_id(stop.stop),
+            limit=EnvLoadUtil.settings().kmb_eta_fan_out_limit,
+            timeout=EnvLoadUtil.settings().kmb_eta_fetch_timeout,
+        ):
+            yield stops[index], eta_response
+
+    @staticmethod
+    async def fetch_kmb_route_eta(route: str, service_type: str) -> KMBStopETAResponse:
+        util_instance = get_global_kmb_util()
+        return await util_instance._route_eta_cache.get_or_fetch(
+            (route, service_type), lambda: KMBRouterUtil._fetch_kmb_route_eta_from_upstream(route, service_type)
+        )
+
+    @staticmethod
+    @timed("kmb_route_eta_upstream")
+    async def _fetch_kmb_route_eta_from_upstream(route: str, service_type: str) -> KMBStopETAResponse:
+        url = EnvLoadUtil.KMB_ROUTE_ETA_URL.format(route=route, service_type=service_type)
+        logger.info(f"Fetching KMB route ETA data for route: {route}, service_type: {service_type} using URL: {url}")
+        response = await get_global_httpx_util().get_all(url)
+        # The route-eta rows carry the same fields as stop-eta rows
+        return KMBRouterUtil._decode_eta(response.content) if response.status_code == 200 else None
+
+    @staticmethod
+    async def fetch_kmb_eta_for_stops_by_route(stops: list, route: str) -> list | None:
+        """
+        Fetch `route`'s ETA feed (one call per service type) and join it to `stops` through
+        the route-stop index. Returns None when the route or its stop sequence is unknown.
+        """
+        util_instance = get_global_kmb_util()
+        if not await util_instance.ensure_route_stops(route):
+            return None
+        route_stop_index = util_instance.get_route_stop_index()
+        route_index = util_instance._route_cache["index"]
+        lanes = route_index.get(route)
+        if not lanes:
+            return None
+        route = lanes[0].route
+        service_types = sorted({lane.service_type for lane in lanes})
+
+        route_etas = await asyncio.wait_for(
+            asyncio.gather(*[KMBRouterUtil.fetch_kmb_route_eta(route, service_type) for service_type in service_types]),
+            timeout=EnvLoadUtil.settings().kmb_eta_fetch_timeout,
+        )
+        if any(route_eta is None for route_eta in route_etas):
+            return None
+
+        rows_by_stop: dict[str, list] = {stop.stop: [] for stop in stops}
+        for route_eta in route_etas:
+            for eta in route_eta.data:
+                stop_id = route_stop_index.stop_at(eta.route, eta.dir, str(eta.service_type), eta.seq)
+                if stop_id in rows_by_stop:
+                    rows_by_stop[stop_id].append(eta)
+
+        header = route_etas[0]
+        return [
+            KMBStopETAResponse.model_construct(
+                type="StopETA",
+                version=header.version,
+                generated_timestamp=header.generated_timestamp,
+                data=rows_by_stop[stop.stop],
+            )
+            for stop in stops
+        ]
+
+    @staticmethod
+    @timed("kmb_eta_stop_upstream")
+    async def _fetch_kmb_eta_stop_from_upstream(stop_id: str) -> KMBStopETAResponse:
         url = EnvLoadUtil.KMB_ROUTER_ETA_URL
         formatted_url = url.format(stop_id=stop_id)
         logger.info(f"Fetching KMB ETA data for stop_id: {stop_id} using URL: {formatted_url}")
         httpx_util = get_global_httpx_util()
         eta_response: KMBStopETAResponse = None
         response = await httpx_util.get_all(formatted_url)
-        eta_response = KMBStopETAResponse(**response.json()) if response.status_code == 200 else None
+        eta_response = KMBRouterUtil._decode_eta(response.content) if response.status_code == 200 else None
         return eta_response
+
+    @staticmethod
+    def _decode_eta(content: bytes) -> KMBStopETAResponse:
+        if EnvLoadUtil.settings().kmb_eta_fast_decode:
+            return EtaDecodeUtil.decode(content)
+        return EtaDecodeUtil.decode_validated(content)
     
     @staticmethod
     async def fetch_kmb_stop() -> StopListResponse:
@@ -79,24 +558,32 @@ class KMBRouterUtil:
         httpx_util = get_global_httpx_util()
         response = await httpx_util.get_all(url)
         stop_list: StopListResponse = None
+        index: StopIndex = None
         if response.status_code == 200:
-            stop_list = StopListResponse(**response.json())
+            # Parse and index off the event loop, the catalog is ~2 MB of JSON
+            stop_list, index = await asyncio.to_thread(KMBRouterUtil._parse_stop_catalog, response.content)
             logger.info(f"Successfully fetched KMB stop data. Total stops: {len(stop_list.data)}")
         else:
             logger.error(f"Failed to fetch KMB stop data. Status code: {response.status_code} loading from file.")
             stop_list = await KMBRouterUtil.load_stop_data_from_file()
-        if stop_list is None:
+        if stop_list is None or not stop_list.data:
+            # Leave the cache empty so the next caller retries instead of indexing nothing
             return StopListResponse(type="", version="", generated_timestamp="", data=[])
         
         util_instance = get_global_kmb_util()
-        util_instance.set_stop_cache(stop_list)
+        util_instance.set_stop_cache(stop_list, index)
 
         return stop_list
         
     @staticmethod
-    async def load_stop_data_from_file() -> StopListResponse:
+    async def load_stop_data_from_file(use_snapshot: bool = True) -> StopListResponse:
+        snapshot = CatalogSnapshotUtil.load() if use_snapshot else None
+        if snapshot is not None:
+            stop_list = snapshot.stop_list()
+            logger.info(f"Successfully loaded KMB stop data from snapshot. Total stops: {len(stop_list.data)}")
+            return stop_list
         try:
-            file_path = os.path.normpath(os.path.join(EnvLoadUtil.load_env("BASE_FOLDER"), "res", EnvLoadUtil.load_env("KMB_STOP_DATA")))
+            file_path = os.path.normpath(os.path.join(EnvLoadUtil.settings().base_folder, "res", EnvLoadUtil.settings().kmb_stop_data))
             with open(file_path, "r", encoding="utf-8") as f:
                 stop_list = StopListResponse(**json.load(f))
                 logger.info(f"Successfully loaded KMB stop data from file. Total stops: {len(stop_list.data)}")
@@ -106,51 +593,90 @@ class KMBRouterUtil:
             return None
     
     @staticmethod
-    async def load_near_stop_with_lat_lon(lat: str, lon: str) -> list:
+    def get_near_stop_radius_m() -> float:
+        """
+        Radius in meters of the circle searched for nearby stops, returned as search_radius_meters.
+        Responses used to carry search_radius_degrees, the half-width of a lat/long square.
+        """
+        return EnvLoadUtil.settings().kmb_near_stop_radius_m
+
+    @staticmethod
+    async def _get_stop_index() -> tuple[StopListResponse, StopIndex] | None:
         util_instance = get_global_kmb_util()
-        if not util_instance._stop_cache["stops"]:
-            logger.info("No stop data in cache, fetching from API...")
-            if await util_instance.fetch_kmb_stop() is None:
-                logger.error("Failed to fetch stop data, cannot find nearby stops.")
-                return []
-            
-        cached_stop_list: StopListResponse = util_instance.get_cached_stop_dict().get("stops")
+        if not util_instance._stop_cache["stops"] and not util_instance.load_stop_cache_from_snapshot():
+            logger.info("No stop data in cache or snapshot, fetching from API...")
+            try:
+                await util_instance.fetch_kmb_stop()
+            except Exception as e:
+                logger.error(f"Failed to fetch KMB stop data. Error: {str(e)}")
+        cached = util_instance.get_cached_stop_dict()
+        stops, index = cached.get("stops"), cached.get("index")
+        if stops is None or index is None or not stops.data:
+            logger.error("No stop data available, cannot find nearby stops.")
+            return None
+        return stops, index
+
+    @staticmethod
+    async def get_stop_catalog_digest() -> str | None:
+        if await KMBRouterUtil._get_stop_index() is None:
+            return None
+        return get_global_kmb_util().get_catalog_digest("stops")
+
+    @staticmethod
+    async def load_near_stop_with_lat_lon(lat: str, lon: str, radius_m: float = None) -> list:
+        """Return stops within `radius_m` meters (default KMB_NEAR_STOP_RADIUS_M), nearest first."""
+        stop_index = await KMBRouterUtil._get_stop_index()
+        if stop_index is None:
+            return []
+        cached_stop_list, index = stop_index
         
-        query_point = [float(lat), float(lon)]
-        tree: KDTree = util_instance.get_cached_stop_dict().get("tree")
-        distance = float(EnvLoadUtil.load_env("KMB_NEAR_STOP_DISTANCE", 0.003))
-        indices = tree.query_ball_point(query_point, distance, p=np.inf)
+        radius_m = KMBRouterUtil.get_near_stop_radius_m() if radius_m is None else radius_m
+        with stage_timer("stop_index_query"):
+            indices, _ = index.query_radius(float(lat), float(lon), radius_m)
         
         nearby_stops = [cached_stop_list.data[i] for i in indices]
         
-        logger.info(f"Found {len(nearby_stops)} stops near lat: {lat}, lon: {lon}")
+        logger.info(f"Found {len(nearby_stops)} stops within {radius_m}m of lat: {lat}, lon: {lon}")
         return nearby_stops
+
+    @staticmethod
+    async def load_nearest_stops_with_lat_lon(lat: str, lon: str, k: int, max_distance_m: float = None) -> list:
+        """Return up to `k` nearest stops, optionally capped at `max_distance_m`, nearest first."""
+        stop_index = await KMBRouterUtil._get_stop_index()
+        if stop_index is None:
+            return []
+        cached_stop_list, index = stop_index
+        
+        max_distance_m = float("inf") if max_distance_m is None else max_distance_m
+        with stage_timer("stop_index_query"):
+            indices, _ = index.query_knn(float(lat), float(lon), k, max_distance_m)
+        return [cached_stop_list.data[i] for i in indices]
     
     @staticmethod
-    def _geocode_address(address: str) -> Nominatim | None:
+    @timed("geocode")
+    async def _geocode_address(address: str) -> tuple | None:
         try:
-            geolocator = Nominatim(user_agent="daily_data_assistant", timeout=10)
             logger.info(f"Geocoding address: {address}")
-            location = geolocator.geocode(address, timeout=10)
-            logger.info(f"Geocoding result: lat={location.latitude if location else 'N/A'}, lon={location.longitude if location else 'N/A'}")
-            return location
+            coords = await get_global_async_geocoder().geocode(address)
+            logger.info(f"Geocoding result: lat={coords[0] if coords else 'N/A'}, lon={coords[1] if coords else 'N/A'}")
+            return coords
         except Exception as e:
             logger.error(f"Geocoding failed for '{address}': {str(e)}")
             return None
 
     @staticmethod
     async def load_near_stop_with_address(address: str) -> list:
-        location = KMBRouterUtil._geocode_address(address)
-        if location is None:
+        coords = await KMBRouterUtil._geocode_address(address)
+        if coords is None:
             logger.error(f"Failed to geocode address: {address}. No location found.")
             return []
         
-        return await KMBRouterUtil.load_near_stop_with_lat_lon(str(location.latitude), str(location.longitude))
+        return await KMBRouterUtil.load_near_stop_with_lat_lon(str(coords[0]), str(coords[1]))
 
     @staticmethod
     async def get_lat_lon_from_address(address: str) -> dict:
-        location = KMBRouterUtil._geocode_address(address)
-        return {"latitude": location.latitude, "longitude": location.longitude} if location else {"error": "Address not found"}
+        coords = await KMBRouterUtil._geocode_address(address)
+        return {"latitude": coords[0], "longitude": coords[1]} if coords else {"error": "Address not found"}
 
 _GOLBAL_KMB_UTIL_INSTANCE = None
 def get_global_kmb_util() -> KMBRouterUtil:
@@ -0,0 +1,80 @@
+# pylint: disable=E0402
+from typing import Any, Callable, Iterable
+
+LANGS = ("en", "tc", "sc")
+
+
+class LangViewUtil:
+
+    @staticmethod
+    def parse_lang(lang: str | None) -> str | None:
+        """Normalize a `lang` query value; None means every language. Raises ValueError if unsupported."""
+        if lang is None or lang == "":
+            return None
+        lang = lang.strip().lower()
+        if lang not in LANGS:
+            raise ValueError(f"Unsupported lang '{lang}', expected one of {', '.join(LANGS)}")
+        return lang
+
+    @staticmethod
+    def stop_info_fields(stop, lang: str = None) -> dict:
+        """Static stop fields of an ETA stop entry; all three names unless `lang` is given."""
+        if lang is None:
+            return {
+                "stop_id": stop.stop,
+                "stop_name_en": stop.name_en,
+                "stop_name_tc": stop.name_tc,
+                "stop_name_sc": stop.name_sc,
+                "latitude": stop.lat,
+                "longitude": stop.long,
+            }
+        return {
+            "stop_id": stop.stop,
+            "stop_name": getattr(stop, f"name_{lang}"),
+            "latitude": stop.lat,
+            "longitude": stop.long,
+        }
+
+    @staticmethod
+    def project_stop(stop, lang: str) -> dict:
+        return {
+            "stop": stop.stop,
+            "name": getattr(stop, f"name_{lang}"),
+            "lat": stop.lat,
+            "long": stop.long,
+        }
+
+    @staticmethod
+    def project_route(lane, lang: str) -> dict:
+        return {
+            "route": lane.route,
+            "bound": lane.bound,
+            "service_type": lane.service_type,
+            "orig": getattr(lane, f"orig_{lang}"),
+            "dest": getattr(lane, f"dest_{lang}"),
+        }
+
+
+class CatalogLangViews:
+    """
+    Single-language projections of one catalog's items, built lazily once per language.
+
+    Views are keyed by item identity, so they must live alongside the catalog they were
+    built from. Items from another catalog generation are projected on the fly.
+    """
+
+    def __init__(self, items: Iterable[Any], project: Callable[[Any, str], dict]):
+        self._items = items
+        self._project = project
+        self._views: dict[str, dict[int, dict]] = {}
+
+    def get(self, lang: str) -> dict[int, dict]:
+        view = self._views.get(lang)
+        if view is None:
+            view = {id(item): self._project(item, lang) for item in self._items}
+            self._views[lang] = view
+        return view
+
+    def project(self, items: Iterable[Any], lang: str) -> list[dict]:
+        view = self.get(lang)
+        return [view.get(id(item)) or self._project(item, lang) for item in items]
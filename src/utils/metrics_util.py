@@ -0,0 +1,197 @@
+# pylint: disable=W0603,E0402,W1203,W0718
+import time
+import asyncio
+import functools
+import logging
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Any, Callable, Iterable
+
+from .env_load_util import EnvLoadUtil
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NOOP_TIMER = nullcontext()
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for label_values, value in self._values.items():
+            lines.append(f"{self.name}{_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus exposition format."""
+
+    def __init__(self, name: str, help_text: str, label_names: tuple[str, ...] = (),
+                 buckets: Iterable[float] = DEFAULT_LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last slot is +Inf), sum, count]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values):
+        series = self._series.get(label_values)
+        if series is None:
+            series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            self._series[label_values] = series
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        for label_values, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{_labels(names, label_values + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, label_values)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, label_values)} {count}")
+        return lines
+
+
+class _StageTimer:
+    __slots__ = ("metrics", "stage", "started_at")
+
+    def __init__(self, metrics: "StageMetrics", stage: str):
+        self.metrics = metrics
+        self.stage = stage
+        self.started_at = 0.0
+
+    def __enter__(self):
+        self.started_at = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and issubclass(exc_type, asyncio.CancelledError):
+            # A caller gave up (client disconnect, timeout): neither an error nor a full-length call
+            self.metrics.record_cancelled(self.stage)
+        else:
+            self.metrics.record(self.stage, time.perf_counter() - self.started_at, failed=exc_type is not None)
+        return False
+
+
+class StageMetrics:
+    """
+    Per-stage latency histograms (their _count is the call count), error counters and
+    counters of calls cancelled mid-flight, which are kept out of both, plus collectors that expose existing component stats() dicts as gauges at scrape time.
+
+    When disabled, `timer()` returns a shared no-op context manager and `timed()` returns
+    the function undecorated, so instrumented code runs exactly as before.
+    """
+
+    def __init__(self, enabled: bool = True, prefix: str = "daily_data_assistant"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.latency = Histogram(f"{prefix}_stage_latency_seconds", "Latency of an instrumented stage.", ("stage",))
+        self.errors = Counter(f"{prefix}_stage_errors_total", "Instrumented stage calls that raised.", ("stage",))
+        self.cancelled = Counter(
+            f"{prefix}_stage_cancelled_total", "Instrumented stage calls cancelled before finishing.", ("stage",)
+        )
+        self._collectors: dict[str, Callable[[], dict]] = {}
+
+    def record(self, stage: str, seconds: float, failed: bool = False):
+        self.latency.observe(seconds, stage)
+        if failed:
+            self.errors.inc(stage)
+
+    def record_cancelled(self, stage: str):
+        self.cancelled.inc(stage)
+
+    def timer(self, stage: str):
+        if not self.enabled:
+            return _NOOP_TIMER
+        return _StageTimer(self, stage)
+
+    def timed(self, stage: str) -> Callable:
+        """Decorator timing an async function as `stage`."""
+        def decorator(func: Callable) -> Callable:
+            if not self.enabled:
+                return func
+
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                with _StageTimer(self, stage):
+                    return await func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def register_collector(self, component: str, collect: Callable[[], dict]):
+        self._collectors[component] = collect
+
+    @staticmethod
+    def _flatten(stats: dict, path: str = "") -> Iterable[tuple[str, float]]:
+        for key, value in stats.items():
+            name = f"{path}.{key}" if path else str(key)
+            if isinstance(value, dict):
+                yield from StageMetrics._flatten(value, name)
+            elif isinstance(value, bool):
+                yield name, int(value)
+            elif isinstance(value, (int, float)):
+                yield name, value
+
+    def _render_collectors(self) -> list[str]:
+        name = f"{self.prefix}_component_stat"
+        lines = [f"# HELP {name} Counters and sizes reported by component stats().", f"# TYPE {name} gauge"]
+        for component, collect in self._collectors.items():
+            try:
+                stats = collect()
+            except Exception as e:
+                logger.error(f"Metrics collector '{component}' failed: {str(e)}")
+                continue
+            for stat, value in self._flatten(stats):
+                lines.append(f"{name}{_labels(('component', 'stat'), (component, stat))} {value}")
+        return lines
+
+    def render(self) -> str:
+        lines = []
+        for metric in (self.latency, self.errors, self.cancelled):
+            lines.extend(metric.render())
+        lines.extend(self._render_collectors())
+        return "\n".join(lines) + "\n"
+
+
+_GLOBAL_STAGE_METRICS_INSTANCE = None
+def get_global_stage_metrics() -> StageMetrics:
+    global _GLOBAL_STAGE_METRICS_INSTANCE
+    if _GLOBAL_STAGE_METRICS_INSTANCE is None:
+        _GLOBAL_STAGE_METRICS_INSTANCE = StageMetrics(enabled=EnvLoadUtil.settings().metrics_enabled)
+    return _GLOBAL_STAGE_METRICS_INSTANCE
+
+
+def timed(stage: str) -> Callable:
+    """Module-level shorthand for get_global_stage_metrics().timed(stage)."""
+    return get_global_stage_metrics().timed(stage)
+
+
+def stage_timer(stage: str) -> Any:
+    return get_global_stage_metrics().timer(stage)
@@ -0,0 +1,161 @@
+# pylint: disable=W0603,E0402,W1203,W0718
+import re
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from .env_load_util import EnvLoadUtil
+from .httpx_util import get_global_httpx_util
+from .cache_util import TTLCache
+from .single_flight_util import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def _clean_text(text: str) -> str:
+    if not text:
+        return ""
+    return re.sub(r'[^\w\s]', ' ', text).strip()
+
+
+class NewsQuota:
+    """Counts NewsAPI requests per UTC day and tracks whether upstream reported the quota as exhausted."""
+
+    def __init__(self, daily_limit: int):
+        self.daily_limit = daily_limit
+        self.day = datetime.now(timezone.utc).date()
+        self.used = 0
+        self.exhausted = False
+
+    def _roll_over(self):
+        today = datetime.now(timezone.utc).date()
+        if today != self.day:
+            self.day, self.used, self.exhausted = today, 0, False
+
+    def available(self) -> bool:
+        self._roll_over()
+        return not self.exhausted and (self.daily_limit <= 0 or self.used < self.daily_limit)
+
+    def record_request(self):
+        self._roll_over()
+        self.used += 1
+
+    def mark_exhausted(self):
+        self.exhausted = True
+
+    def stats(self) -> dict:
+        self._roll_over()
+        return {
+            "day": self.day.isoformat(),
+            "used": self.used,
+            "daily_limit": self.daily_limit,
+            "exhausted": self.exhausted or (0 < self.daily_limit <= self.used),
+        }
+
+
+class NewsUtil:
+    """
+    NewsAPI client on the shared httpx pool.
+
+    Summaries are cached per keyword with stale-while-revalidate, concurrent misses
+    for the same keyword share one request, and each upstream call is counted against
+    the daily quota. When the quota is spent or a call fails, the last good result for
+    the keyword is returned instead of an empty list.
+    """
+
+    def __init__(self, api_key: str, timeout: float = 5, daily_quota: int = 100, cache_ttl: float = 900,
+                 cache_stale_ttl: float = 2700, cache_max_size: int = 256, url: str = EnvLoadUtil.NEWS_API_URL):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.url = url
+        self.quota = NewsQuota(daily_quota)
+        self._cache = TTLCache(ttl=cache_ttl, stale_ttl=cache_stale_ttl, max_size=cache_max_size, name="news")
+        self._single_flight = SingleFlight(name="news")
+        self._last_good: OrderedDict[str, list] = OrderedDict()
+        self._last_good_max_size = cache_max_size
+
+    @staticmethod
+    def _normalize(keyword: str) -> str:
+        return (keyword or "").strip().casefold()
+
+    async def get_news_summary(self, keyword: str) -> list:
+        if not self.api_key:
+            logger.error("NEWS_API_KEY is not set or empty in .env")
+            return []
+        key = self._normalize(keyword)
+        result = await self._cache.get_or_fetch(key, lambda: self._single_flight.do(key, lambda: self._fetch(keyword)))
+        if result is None:
+            return self._last_good.get(key, [])
+        return result
+
+    def _remember(self, key: str, result: list):
+        self._last_good[key] = result
+        self._last_good.move_to_end(key)
+        while len(self._last_good) > self._last_good_max_size:
+            self._last_good.popitem(last=False)
+
+    async def _fetch(self, keyword: str) -> list | None:
+        """Return the parsed articles, or None when nothing new could be fetched."""
+        if not self.quota.available():
+            logger.warning(f"NewsAPI quota exhausted, serving last good result for '{keyword}'")
+            return None
+
+        self.quota.record_request()
+        try:
+            response = await get_global_httpx_util().get(
+                self.url,
+                params={"q": keyword, "sortBy": "publishedAt", "language": "en"},
+                headers={"X-Api-Key": self.api_key},
+                timeout=self.timeout,
+            )
+            news_data = response.json()
+        except Exception as e:
+            logger.error(f"Error fetching news summary: {str(e)}")
+            return None
+
+        if response.status_code == 429 or news_data.get("code") in ("rateLimited", "apiKeyExhausted"):
+            logger.warning(f"NewsAPI reported quota exhaustion: {news_data.get('message')}")
+            self.quota.mark_exhausted()
+            return None
+        if response.status_code != 200 or news_data.get("status") != "ok":
+            logger.error(f"NewsAPI request failed. Status code: {response.status_code}, message: {news_data.get('message')}")
+            return None
+
+        logger.info(f"Total results: {news_data.get('totalResults')}")
+        result = []
+        for article in news_data.get('articles', [])[:10]:
+            description = article.get('description') or ""
+            if len(description) > 30:
+                result.append({
+                    "source": _clean_text(article['source']['name']),
+                    "title": _clean_text(article['title']),
+                    "description": _clean_text(description),
+                    "publishedAt": article['publishedAt'],
+                })
+
+        logger.info(f"Returning {len(result)} news articles")
+        self._remember(self._normalize(keyword), result)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "cache": self._cache.stats(),
+            "single_flight": self._single_flight.stats(),
+            "quota": self.quota.stats(),
+        }
+
+
+_GLOBAL_NEWS_UTIL_INSTANCE = None
+def get_global_news_util() -> NewsUtil:
+    global _GLOBAL_NEWS_UTIL_INSTANCE
+    if _GLOBAL_NEWS_UTIL_INSTANCE is None:
+        settings = EnvLoadUtil.settings()
+        _GLOBAL_NEWS_UTIL_INSTANCE = NewsUtil(
+            api_key=settings.news_api_key,
+            timeout=settings.news_api_timeout,
+            daily_quota=settings.news_api_daily_quota,
+            cache_ttl=settings.news_cache_ttl,
+            cache_stale_ttl=settings.news_cache_stale_ttl,
+            cache_max_size=settings.news_cache_max_size,
+        )
+    return _GLOBAL_NEWS_UTIL_INSTANCE
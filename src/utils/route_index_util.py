@@ -0,0 +1,55 @@
+# pylint: disable=E0402
+from bisect import bisect_left
+
+from models.kmb.router.route_lane import RouterLane, KMBRouterResponse
+
+
+class RouteIndex:
+    """
+    Lookup tables over the KMB route catalog, built once per catalog version.
+
+    Exact lookups by route, (route, bound) or (route, bound, service_type) are dict
+    hits. Prefix search ("1" -> 1, 1A, 10, ...) bisects a sorted list of route numbers.
+    """
+
+    def __init__(self, route_list: KMBRouterResponse):
+        self.route_list = route_list
+        self._by_key: dict[tuple[str, str, str], RouterLane] = {}
+        self._by_route: dict[str, list[RouterLane]] = {}
+        for lane in route_list.data:
+            route = self.normalize(lane.route)
+            self._by_key[(route, lane.bound, lane.service_type)] = lane
+            self._by_route.setdefault(route, []).append(lane)
+        self._sorted_routes = sorted(self._by_route)
+
+    def __len__(self) -> int:
+        return len(self._by_key)
+
+    @staticmethod
+    def normalize(route: str) -> str:
+        return (route or "").strip().upper()
+
+    def get(self, route: str, bound: str = None, service_type: str = None) -> list[RouterLane]:
+        route = self.normalize(route)
+        if bound is not None and service_type is not None:
+            lane = self._by_key.get((route, bound.upper(), service_type))
+            return [lane] if lane is not None else []
+        lanes = self._by_route.get(route, [])
+        if bound is not None:
+            lanes = [lane for lane in lanes if lane.bound == bound.upper()]
+        if service_type is not None:
+            lanes = [lane for lane in lanes if lane.service_type == service_type]
+        return lanes
+
+    def route_numbers_with_prefix(self, prefix: str) -> list[str]:
+        prefix = self.normalize(prefix)
+        start = bisect_left(self._sorted_routes, prefix)
+        matches = []
+        for route in self._sorted_routes[start:]:
+            if not route.startswith(prefix):
+                break
+            matches.append(route)
+        return matches
+
+    def search_prefix(self, prefix: str) -> list[RouterLane]:
+        return [lane for route in self.route_numbers_with_prefix(prefix) for lane in self._by_route[route]]
@@ -0,0 +1,58 @@
+# pylint: disable=E0402
+from models.kmb.route_stop.route_stop_response import RouteStop, RouteStopListResponse
+
+
+class RouteStopIndex:
+    """
+    Indexes over the KMB route-stop sequences.
+
+    - stop_id -> route numbers serving it (inverted index)
+    - (route, bound, service_type) -> stop ids ordered by sequence
+    - (route, bound, service_type, seq) -> stop id
+    """
+
+    def __init__(self, route_stop_list: RouteStopListResponse = None):
+        self.generated_timestamp = route_stop_list.generated_timestamp if route_stop_list else ""
+        self._stop_routes: dict[str, set[str]] = {}
+        self._route_stops: dict[tuple[str, str, str], list[tuple[int, str]]] = {}
+        self._seq_stop: dict[tuple[str, str, str, int], str] = {}
+        self._routes: set[str] = set()
+        if route_stop_list is not None:
+            self.add(route_stop_list.data)
+
+    def __len__(self) -> int:
+        return len(self._seq_stop)
+
+    @staticmethod
+    def _key(route: str, bound: str, service_type: str) -> tuple[str, str, str]:
+        return (route or "").strip().upper(), (bound or "").strip().upper(), str(service_type)
+
+    def add(self, route_stops: list[RouteStop]):
+        touched = set()
+        for route_stop in route_stops:
+            key = self._key(route_stop.route, route_stop.bound, route_stop.service_type)
+            seq = int(route_stop.seq)
+            if key + (seq,) in self._seq_stop:
+                continue
+            self._stop_routes.setdefault(route_stop.stop, set()).add(key[0])
+            self._route_stops.setdefault(key, []).append((seq, route_stop.stop))
+            self._seq_stop[key + (seq,)] = route_stop.stop
+            self._routes.add(key[0])
+            touched.add(key)
+        for key in touched:
+            self._route_stops[key].sort()
+
+    def has_route(self, route: str) -> bool:
+        return (route or "").strip().upper() in self._routes
+
+    def routes_for_stop(self, stop_id: str) -> set[str]:
+        return self._stop_routes.get(stop_id, set())
+
+    def serves(self, stop_id: str, route: str) -> bool:
+        return (route or "").strip().upper() in self._stop_routes.get(stop_id, ())
+
+    def stops_for_route(self, route: str, bound: str, service_type: str) -> list[str]:
+        return [stop_id for _, stop_id in self._route_stops.get(self._key(route, bound, service_type), [])]
+
+    def stop_at(self, route: str, bound: str, service_type: str, seq: int) -> str | None:
+        return self._seq_stop.get(self._key(route, bound, service_type) + (int(seq),))
@@ -0,0 +1,53 @@
+# pylint: disable=E0402
+import numpy as np
+
+EARTH_RADIUS_METERS = 6371008.8
+
+
+class StationIndex:
+    """
+    Great-circle nearest-neighbour index over a small, fixed set of points.
+
+    Distances to every station are computed in one vectorized haversine pass and
+    the top-n are selected with argpartition, so a query costs O(N) with no
+    Python-level loop. `nearest_batch` answers many query points in one call.
+    """
+
+    def __init__(self, lats, lons):
+        self._lat = np.radians(np.asarray(lats, dtype=np.float64))
+        self._lon = np.radians(np.asarray(lons, dtype=np.float64))
+        self._cos_lat = np.cos(self._lat)
+
+    def __len__(self) -> int:
+        return self._lat.shape[0]
+
+    def distances_batch(self, query_lats, query_lons) -> np.ndarray:
+        """Return an (M, N) matrix of distances in meters from each query point to each station."""
+        q_lat = np.radians(np.asarray(query_lats, dtype=np.float64))[:, None]
+        q_lon = np.radians(np.asarray(query_lons, dtype=np.float64))[:, None]
+        d_lat = self._lat[None, :] - q_lat
+        d_lon = self._lon[None, :] - q_lon
+        a = np.sin(d_lat / 2.0) ** 2 + np.cos(q_lat) * self._cos_lat[None, :] * np.sin(d_lon / 2.0) ** 2
+        return 2.0 * EARTH_RADIUS_METERS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+    def nearest_batch(self, query_lats, query_lons, top_n: int = 5) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Return (indices, distances) arrays of shape (M, k), k = min(top_n, N),
+        with each row sorted by ascending distance in meters.
+        """
+        distances = self.distances_batch(query_lats, query_lons)
+        k = min(top_n, len(self))
+        if k <= 0:
+            empty = np.empty((distances.shape[0], 0))
+            return empty.astype(np.intp), empty
+        if k < len(self):
+            candidates = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.tile(np.arange(len(self)), (distances.shape[0], 1))
+        candidate_distances = np.take_along_axis(distances, candidates, axis=1)
+        order = np.argsort(candidate_distances, axis=1)
+        return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_distances, order, axis=1)
+
+    def nearest(self, lat: float, lon: float, top_n: int = 5) -> tuple[np.ndarray, np.ndarray]:
+        indices, distances = self.nearest_batch([lat], [lon], top_n=top_n)
+        return indices[0], distances[0]
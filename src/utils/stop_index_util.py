@@ -0,0 +1,80 @@
+import numpy as np
+from scipy.spatial import KDTree
+
+EARTH_RADIUS_METERS = 6371008.8
+
+
+class StopIndex:
+    """
+    Metric spatial index over bus stops.
+
+    Stop coordinates are projected onto a local east/north tangent plane (meters)
+    centred on the catalog, where Euclidean distance matches ground distance to
+    well under 0.1% across Hong Kong. Queries therefore take radii in meters and
+    return true circles instead of the degree-space squares of a raw lat/long tree.
+    """
+
+    def __init__(self, lats, lons, origin: tuple[float, float] | None = None):
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        if origin is None:
+            origin = (float(lats.mean()), float(lons.mean())) if lats.size else (22.3, 114.17)
+        self.origin = origin
+        self._cos_origin = np.cos(np.radians(origin[0]))
+        self.xy = self.project(lats, lons)
+        self.tree = KDTree(self.xy) if lats.size else None
+
+    @classmethod
+    def from_prebuilt(cls, xy: np.ndarray, origin: tuple[float, float], tree: KDTree | None) -> "StopIndex":
+        """Rebuild an index from already projected coordinates, reusing `tree` or building one over `xy`."""
+        index = cls.__new__(cls)
+        index.origin = origin
+        index._cos_origin = np.cos(np.radians(origin[0]))
+        index.xy = xy
+        index.tree = tree if tree is not None or xy.shape[0] == 0 else KDTree(xy)
+        return index
+
+    def __len__(self) -> int:
+        return self.xy.shape[0]
+
+    def project(self, lats, lons) -> np.ndarray:
+        """Project degrees to (east, north) meters relative to the index origin."""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        east = np.radians(lons - self.origin[1]) * self._cos_origin * EARTH_RADIUS_METERS
+        north = np.radians(lats - self.origin[0]) * EARTH_RADIUS_METERS
+        return np.column_stack((east, north))
+
+    def query_radius(self, lat: float, lon: float, radius_m: float) -> tuple[np.ndarray, np.ndarray]:
+        """Return (indices, distances_m) of stops within `radius_m`, nearest first."""
+        return self.query_radius_batch([lat], [lon], radius_m)[0]
+
+    def query_radius_batch(self, lats, lons, radius_m: float) -> list[tuple[np.ndarray, np.ndarray]]:
+        points = self.project(lats, lons)
+        if self.tree is None:
+            return [(np.empty(0, dtype=np.intp), np.empty(0)) for _ in range(points.shape[0])]
+        results = []
+        for point, indices in zip(points, self.tree.query_ball_point(points, radius_m)):
+            indices = np.asarray(indices, dtype=np.intp)
+            distances = np.hypot(*(self.xy[indices] - point).T) if indices.size else np.empty(0)
+            order = np.argsort(distances)
+            results.append((indices[order], distances[order]))
+        return results
+
+    def query_knn(self, lat: float, lon: float, k: int, max_distance_m: float = np.inf) -> tuple[np.ndarray, np.ndarray]:
+        """Return (indices, distances_m) of the `k` nearest stops within `max_distance_m`, nearest first."""
+        return self.query_knn_batch([lat], [lon], k, max_distance_m)[0]
+
+    def query_knn_batch(self, lats, lons, k: int, max_distance_m: float = np.inf) -> list[tuple[np.ndarray, np.ndarray]]:
+        points = self.project(lats, lons)
+        k = min(k, len(self))
+        if self.tree is None or k <= 0:
+            return [(np.empty(0, dtype=np.intp), np.empty(0)) for _ in range(points.shape[0])]
+        distances, indices = self.tree.query(points, k=k, distance_upper_bound=max_distance_m)
+        distances = np.asarray(distances).reshape(points.shape[0], k)
+        indices = np.asarray(indices).reshape(points.shape[0], k)
+        results = []
+        for row_distances, row_indices in zip(distances, indices):
+            found = np.isfinite(row_distances)
+            results.append((row_indices[found].astype(np.intp), row_distances[found]))
+        return results
@@ -0,0 +1,75 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from utils.catalog_response_util import CatalogResponseCache
+
+BODY = {"data": [{"route": str(i), "dest_en": "STAR FERRY"} for i in range(200)]}
+
+
+def _client(cache: CatalogResponseCache) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/catalog")
+    async def catalog(request: Request):
+        async def build():
+            return BODY
+        return await cache.respond(request, "digest-1", ("catalog",), build)
+
+    return TestClient(app)
+
+
+def test_each_encoding_has_its_own_etag():
+    client = _client(CatalogResponseCache(min_compress_size=64))
+
+    identity = client.get("/catalog", headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/catalog", headers={"Accept-Encoding": "gzip"})
+
+    assert identity.json() == gzipped.json() == BODY
+    assert gzipped.headers["Content-Encoding"] == "gzip"
+    assert "Content-Encoding" not in identity.headers
+    assert gzipped.headers["ETag"] == identity.headers["ETag"][:-1] + '-gzip"'
+
+
+def test_small_bodies_keep_the_identity_etag():
+    client = _client(CatalogResponseCache(min_compress_size=1 << 20))
+
+    identity = client.get("/catalog", headers={"Accept-Encoding": "identity"})
+    gzip_requested = client.get("/catalog", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in gzip_requested.headers
+    assert gzip_requested.headers["ETag"] == identity.headers["ETag"]
+
+
+def test_if_none_match_uses_weak_comparison():
+    cache = CatalogResponseCache(min_compress_size=64)
+    client = _client(cache)
+    etag = client.get("/catalog", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+
+    strong = client.get("/catalog", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    weak = client.get("/catalog", headers={"Accept-Encoding": "gzip", "If-None-Match": f'"other", W/{etag}'})
+    other = client.get("/catalog", headers={"Accept-Encoding": "gzip", "If-None-Match": '"other"'})
+
+    assert strong.status_code == weak.status_code == 304
+    assert strong.headers["ETag"] == etag
+    assert other.status_code == 200
+    assert cache.not_modified == 2
+
+
+def test_identity_etag_revalidates_when_client_now_accepts_gzip():
+    client = _client(CatalogResponseCache(min_compress_size=64))
+    etag = client.get("/catalog", headers={"Accept-Encoding": "identity"}).headers["ETag"]
+
+    revalidated = client.get("/catalog", headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+
+    assert revalidated.status_code == 304
+    assert revalidated.headers["ETag"] == etag
+
+
+def test_gzip_etag_does_not_match_an_identity_request():
+    client = _client(CatalogResponseCache(min_compress_size=64))
+    gzip_etag = client.get("/catalog", headers={"Accept-Encoding": "gzip"}).headers["ETag"]
+
+    response = client.get("/catalog", headers={"Accept-Encoding": "identity", "If-None-Match": gzip_etag})
+
+    assert response.status_code == 200
+    assert "Content-Encoding" not in response.headers
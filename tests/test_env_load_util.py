@@ -0,0 +1,35 @@
+import logging
+
+from utils.env_load_util import Settings
+
+
+def test_settings_convert_typed_values():
+    settings = Settings.from_mapping({"KMB_NEAR_STOP_RADIUS_M": "450", "HTTPX_HTTP2": "off", "HTTPX_MAX_CONNECTIONS": "7"})
+
+    assert settings.kmb_near_stop_radius_m == 450.0
+    assert settings.httpx_http2 is False
+    assert settings.httpx_max_connections == 7
+
+
+def test_invalid_value_keeps_the_default(caplog):
+    with caplog.at_level(logging.ERROR, logger="utils.env_load_util"):
+        settings = Settings.from_mapping({"KMB_NEAR_STOP_RADIUS_M": "far"})
+
+    assert settings.kmb_near_stop_radius_m == 300
+    assert "KMB_NEAR_STOP_RADIUS_M" in caplog.text
+
+
+def test_retired_near_stop_distance_warns(caplog):
+    with caplog.at_level(logging.WARNING, logger="utils.env_load_util"):
+        settings = Settings.from_mapping({"KMB_NEAR_STOP_DISTANCE": "0.005"})
+
+    assert settings.kmb_near_stop_radius_m == 300
+    assert "KMB_NEAR_STOP_DISTANCE='0.005' is ignored" in caplog.text
+    assert "KMB_NEAR_STOP_RADIUS_M" in caplog.text
+
+
+def test_no_warning_without_retired_variables(caplog):
+    with caplog.at_level(logging.WARNING, logger="utils.env_load_util"):
+        Settings.from_mapping({"KMB_NEAR_STOP_RADIUS_M": "300"})
+
+    assert "ignored" not in caplog.text
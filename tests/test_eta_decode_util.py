@@ -0,0 +1,80 @@
+import json
+import os
+
+import pytest
+from pydantic import ValidationError
+
+from models.kmb.stop_eta.kmb_stop_eta import KMBStopETAResponse
+from utils.eta_decode_util import EtaDecodeUtil, EtaFeed
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+PAYLOADS = ["kmb_stop_eta.json", "kmb_route_eta.json"]
+
+
+def _read(name: str) -> bytes:
+    with open(os.path.join(FIXTURE_DIR, name), "rb") as f:
+        return f.read()
+
+
+def _with_first_row(name: str, **fields) -> bytes:
+    payload = json.loads(_read(name))
+    payload["data"][0].update(fields)
+    return json.dumps(payload).encode()
+
+
+@pytest.mark.parametrize("name", PAYLOADS)
+@pytest.mark.parametrize("route", [None, "1A", "6C", "NO-SUCH-ROUTE"])
+def test_fast_decode_matches_pydantic(name, route):
+    content = _read(name)
+
+    feed = EtaDecodeUtil.decode(content, route=route)
+
+    assert isinstance(feed, EtaFeed)
+    assert feed.validate() == EtaDecodeUtil.decode_validated(content, route=route)
+    if route is not None:
+        assert all(row.route == route for row in feed.data)
+
+
+def test_route_filter_keeps_only_that_route():
+    content = _read("kmb_stop_eta.json")
+
+    everything = EtaDecodeUtil.decode(content)
+    only_1a = EtaDecodeUtil.decode(content, route="1A")
+
+    assert 0 < len(only_1a.data) < len(everything.data)
+    assert len(only_1a.data) == sum(1 for row in everything.data if row.route == "1A")
+
+
+@pytest.mark.parametrize("route", [None, "1A"])
+def test_malformed_row_falls_back_to_pydantic(route):
+    # "3.0" is rejected by int() but coerced by pydantic, so only the fallback can decode it
+    content = _with_first_row("kmb_route_eta.json", seq="3.0")
+
+    feed = EtaDecodeUtil.decode(content, route=route)
+
+    assert isinstance(feed, KMBStopETAResponse)
+    assert feed == EtaDecodeUtil.decode_validated(content, route=route)
+    assert feed.data[0].seq == 3
+
+
+def test_invalid_row_raises_the_same_validation_error():
+    content = _with_first_row("kmb_stop_eta.json", seq="not-a-number")
+
+    with pytest.raises(ValidationError) as fast:
+        EtaDecodeUtil.decode(content)
+    with pytest.raises(ValidationError) as validated:
+        EtaDecodeUtil.decode_validated(content)
+
+    assert fast.value.errors() == validated.value.errors()
+
+
+def test_null_remark_is_only_rejected_on_validate():
+    # The fast path does not type-check strings, validate() reports what pydantic would have
+    content = _with_first_row("kmb_stop_eta.json", rmk_en=None)
+
+    feed = EtaDecodeUtil.decode(content)
+
+    with pytest.raises(ValidationError):
+        feed.validate()
+    with pytest.raises(ValidationError):
+        EtaDecodeUtil.decode_validated(content)
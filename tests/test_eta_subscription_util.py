@@ -0,0 +1,111 @@
+import asyncio
+import importlib
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from utils.eta_subscription_util import EtaSubscriptionHub
+from utils.kmb_util import KMBRouterUtil
+
+# routes/__init__.py re-exports the APIRouter under the module's name
+kmb_router = importlib.import_module("routes.kmb_router")
+
+ETA_ROW = SimpleNamespace(
+    route="1A", dest_en="STAR FERRY", dest_tc="尖沙咀碼頭", dest_sc="尖沙咀码头", eta="2026-10-17T10:00:00+08:00",
+    eta_seq=1, dir="O", service_type=1, rmk_en="", rmk_tc="", rmk_sc="",
+)
+
+
+@pytest.fixture
+def slow_fetch(monkeypatch):
+    """Stop-ETA fetch that waits for `release` so a test can act while it is in flight."""
+    release = asyncio.Event()
+
+    async def fetch(stop_id):
+        await release.wait()
+        return SimpleNamespace(data=[ETA_ROW])
+
+    monkeypatch.setattr(KMBRouterUtil, "fetch_kmb_eta_stop_by_stop_id", staticmethod(fetch))
+    return release
+
+
+def test_subscribe_keeps_state_and_sends_snapshot(slow_fetch):
+    async def run():
+        hub = EtaSubscriptionHub(poll_interval=3600)
+        subscriber = hub.register()
+        slow_fetch.set()
+        await hub.subscribe(subscriber, "STOP1")
+        message = subscriber.queue.get_nowait()
+        await hub.close()
+        return hub, message
+
+    hub, message = asyncio.run(run())
+
+    assert message["type"] == "snapshot"
+    assert [entry["route"] for entry in message["eta_data"]] == ["1A"]
+    assert set(hub._state) == {"STOP1"}
+
+
+def test_cancelled_subscribe_cleans_up(slow_fetch):
+    async def run():
+        hub = EtaSubscriptionHub(poll_interval=3600)
+        subscriber = hub.register()
+        task = asyncio.create_task(hub.subscribe(subscriber, "STOP1"))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return hub, subscriber
+
+    hub, subscriber = asyncio.run(run())
+
+    assert not subscriber.subscriptions
+    assert not hub._stop_subscribers
+    assert not hub._state
+
+
+def test_unregister_during_fetch_leaves_no_state(slow_fetch):
+    async def run():
+        hub = EtaSubscriptionHub(poll_interval=3600)
+        subscriber = hub.register()
+        task = asyncio.create_task(hub.subscribe(subscriber, "STOP1"))
+        await asyncio.sleep(0)
+        hub.unregister(subscriber)
+        slow_fetch.set()
+        await task
+        return hub, subscriber
+
+    hub, subscriber = asyncio.run(run())
+
+    assert not hub._stop_subscribers
+    assert not hub._state
+    assert subscriber.queue.empty()
+    assert hub._poller is None
+
+
+def test_websocket_rejects_bad_messages_without_closing(slow_fetch, monkeypatch):
+    hub = EtaSubscriptionHub(poll_interval=3600)
+    monkeypatch.setattr(kmb_router, "get_global_eta_subscription_hub", lambda: hub)
+    app = FastAPI()
+    app.include_router(kmb_router.router)
+    slow_fetch.set()
+
+    with TestClient(app).websocket_connect("/kmb_router/eta/ws") as websocket:
+        websocket.send_text("not json")
+        not_json = websocket.receive_json()
+        websocket.send_json({"action": "subscribe", "stop_id": 123})
+        bad_type = websocket.receive_json()
+        websocket.send_json({"action": "watch", "stop_id": "STOP1"})
+        bad_action = websocket.receive_json()
+        websocket.send_json({"action": "subscribe", "stop_id": "STOP1", "route": "1A"})
+        snapshot = websocket.receive_json()
+
+    assert not_json["type"] == bad_type["type"] == bad_action["type"] == "error"
+    assert any(detail.startswith("stop_id") for detail in bad_type["details"])
+    assert any(detail.startswith("action") for detail in bad_action["details"])
+    assert snapshot["type"] == "snapshot"
+    assert snapshot["stop_id"] == "STOP1"
+    assert not hub._stop_subscribers
+    assert not hub._state
@@ -0,0 +1,54 @@
+import os
+
+from utils.geocode_cache_util import GeocodeCache
+
+
+def test_put_is_visible_at_once_and_persisted_after_flush(tmp_path):
+    db_path = os.path.join(tmp_path, "geocode.sqlite3")
+    cache = GeocodeCache(db_path)
+
+    cache.put("Nathan Road  320", (22.31, 114.17))
+    cache.put("nowhere", None)
+
+    assert cache.lookup("nathan road 320") == (True, (22.31, 114.17))
+    assert cache.lookup("NOWHERE") == (True, None)
+    cache.close()
+
+    reloaded = GeocodeCache(db_path)
+    assert reloaded.warm() == 2
+    assert reloaded.lookup("Nathan Road 320") == (True, (22.31, 114.17))
+    reloaded.close()
+
+
+def test_put_does_not_wait_for_the_disk(tmp_path):
+    cache = GeocodeCache(os.path.join(tmp_path, "geocode.sqlite3"))
+
+    # Hold the database as a slow commit would: put() must still return with memory updated
+    with cache._db_lock:
+        future = cache.put("Mong Kok", (22.32, 114.17))
+        assert cache.lookup("mong kok") == (True, (22.32, 114.17))
+        assert not future.done()
+    future.result(timeout=5)
+    cache.close()
+
+
+def test_evicted_entries_are_deleted_from_disk(tmp_path):
+    db_path = os.path.join(tmp_path, "geocode.sqlite3")
+    cache = GeocodeCache(db_path, max_size=2)
+    for i in range(4):
+        cache.put(f"stop {i}", (22.3 + i / 100, 114.1))
+    cache.close()
+
+    reloaded = GeocodeCache(db_path, max_size=10)
+    assert reloaded.warm() == 2
+    assert reloaded.lookup("stop 0") == (False, None)
+    assert reloaded.lookup("stop 3")[0]
+    reloaded.close()
+
+
+def test_memory_only_cache_skips_the_writer():
+    cache = GeocodeCache(None)
+
+    assert cache.put("Jordan", (22.30, 114.17)) is None
+    assert cache.lookup("jordan") == (True, (22.30, 114.17))
+    cache.close()
@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from utils.geocode_cache_util import GeocodeCache
+from utils.geocoder_util import AsyncGeocoder, TokenBucket
+
+
+class FakeGeocoder:
+    """Stands in for geopy's Nominatim: known places resolve, "boom" raises, anything else is not found."""
+
+    PLACES = {"mong kok": (22.3193, 114.1694), "jordan": (22.3049, 114.1717), "tsim sha tsui": (22.2976, 114.1722)}
+
+    def __init__(self):
+        self.calls: list[str] = []
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def geocode(self, query: str, timeout: float = None):
+        self.calls.append(query)
+        self.gate.wait(5)
+        if query == "boom":
+            raise TimeoutError("upstream timed out")
+        coords = self.PLACES.get(GeocodeCache.normalize(query))
+        return SimpleNamespace(latitude=coords[0], longitude=coords[1]) if coords else None
+
+
+def _geocoder(rate: float = 1000, burst: int = 10) -> tuple[AsyncGeocoder, FakeGeocoder]:
+    fake = FakeGeocoder()
+    return AsyncGeocoder(geocoder=fake, cache=GeocodeCache(None), rate=rate, burst=burst), fake
+
+
+def test_concurrent_identical_queries_share_one_lookup():
+    geocoder, fake = _geocoder()
+    fake.gate.clear()
+
+    async def run():
+        waiters = [asyncio.create_task(geocoder.geocode(query))
+                   for query in ("Mong Kok", "mong kok", " MONG  KOK ", "Mong Kok", "mong  kok")]
+        await asyncio.sleep(0.01)
+        fake.gate.set()
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(run())
+
+    assert results == [(22.3193, 114.1694)] * 5
+    assert fake.calls == ["Mong Kok"]
+    assert geocoder.stats() == {"lookups": 1, "coalesced": 4, "pending": 0}
+    geocoder.close()
+
+
+def test_token_bucket_allows_a_burst_then_paces():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=3)
+        started = time.monotonic()
+        times = []
+        for _ in range(6):
+            await bucket.acquire()
+            times.append(time.monotonic() - started)
+        return times
+
+    times = asyncio.run(run())
+
+    # Three tokens up front, then one every 1/20 s
+    assert times[2] < 0.04
+    assert times[5] >= 0.14
+    assert all(later - earlier >= 0.04 for earlier, later in zip(times[2:], times[3:]))
+
+
+def test_distinct_queries_are_paced_by_the_bucket():
+    geocoder, fake = _geocoder(rate=20, burst=1)
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(geocoder.geocode(query) for query in ("Mong Kok", "Jordan", "Tsim Sha Tsui")))
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+
+    assert sorted(fake.calls) == ["Jordan", "Mong Kok", "Tsim Sha Tsui"]
+    assert elapsed >= 0.09
+    geocoder.close()
+
+
+def test_last_waiter_cancelling_cancels_the_lookup():
+    # rate 0.5/s with the only token spent: the lookup sits in the bucket for ~2 s
+    geocoder, fake = _geocoder(rate=0.5, burst=1)
+
+    async def run():
+        await geocoder.bucket.acquire()
+        waiter = asyncio.create_task(geocoder.geocode("Mong Kok"))
+        await asyncio.sleep(0.01)
+        lookup = geocoder._pending["mong kok"][0]
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        return lookup
+
+    lookup = asyncio.run(run())
+
+    assert lookup.cancelled()
+    assert not fake.calls
+    assert geocoder.pending_count() == 0
+    assert geocoder.cache.lookup("Mong Kok") == (False, None)
+    geocoder.close()
+
+
+def test_one_of_several_waiters_cancelling_keeps_the_lookup():
+    geocoder, fake = _geocoder()
+    fake.gate.clear()
+
+    async def run():
+        first = asyncio.create_task(geocoder.geocode("Jordan"))
+        second = asyncio.create_task(geocoder.geocode("jordan"))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        fake.gate.set()
+        return await second
+
+    assert asyncio.run(run()) == (22.3049, 114.1717)
+    assert fake.calls == ["Jordan"]
+    assert geocoder.cache.lookup("Jordan") == (True, (22.3049, 114.1717))
+    geocoder.close()
+
+
+def test_not_found_is_cached_but_errors_are_not():
+    geocoder, fake = _geocoder()
+
+    async def run():
+        return [await geocoder.geocode(query) for query in ("Nowhere Street", "nowhere street", "boom", "boom")]
+
+    results = asyncio.run(run())
+
+    assert results == [None, None, None, None]
+    # The negative result is served from cache; the failed lookup is retried
+    assert fake.calls == ["Nowhere Street", "boom", "boom"]
+    assert geocoder.cache.lookup("Nowhere Street") == (True, None)
+    assert geocoder.cache.lookup("boom") == (False, None)
+    geocoder.close()
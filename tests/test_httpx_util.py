@@ -0,0 +1,92 @@
+import asyncio
+
+import httpx
+
+from utils.httpx_util import HttpxUtil
+
+STOP_URL = "https://data.etabus.gov.hk/v1/transport/kmb/stop"
+ROUTE_URL = "https://data.etabus.gov.hk/v1/transport/kmb/route"
+
+
+def _counting_transport(calls: dict, delay: float = 0.05) -> httpx.MockTransport:
+    async def handler(request: httpx.Request) -> httpx.Response:
+        calls[str(request.url)] = calls.get(str(request.url), 0) + 1
+        # Hold the response open long enough for every concurrent caller to pile onto it
+        await asyncio.sleep(delay)
+        return httpx.Response(200, json={"url": str(request.url)})
+    return httpx.MockTransport(handler)
+
+
+def test_concurrent_get_all_makes_one_upstream_call_per_url():
+    calls = {}
+    util = HttpxUtil(transport=_counting_transport(calls))
+
+    async def run():
+        urls = [STOP_URL, ROUTE_URL] * 10
+        responses = await asyncio.gather(*(util.get_all(url) for url in urls))
+        await util.close()
+        return urls, responses
+
+    urls, responses = asyncio.run(run())
+
+    assert calls == {STOP_URL: 1, ROUTE_URL: 1}
+    assert [response.json()["url"] for response in responses] == urls
+    stats = util.get_single_flight_stats()
+    assert stats["calls"] == 20
+    assert stats["executions"] == 2
+    assert stats["coalesced"] == 18
+    assert stats["in_flight"] == 0
+
+
+def test_sequential_get_all_is_not_coalesced():
+    calls = {}
+    util = HttpxUtil(transport=_counting_transport(calls, delay=0))
+
+    async def run():
+        await util.get_all(STOP_URL)
+        await util.get_all(STOP_URL)
+        await util.close()
+
+    asyncio.run(run())
+
+    assert calls == {STOP_URL: 2}
+
+
+def test_pooled_client_is_reused_until_closed():
+    calls = {}
+    util = HttpxUtil(transport=_counting_transport(calls, delay=0))
+
+    async def run():
+        await util.open()
+        client = util.client
+        await util.get_all(STOP_URL)
+        await util.get(ROUTE_URL, params={"lang": "en"})
+        await util.post(ROUTE_URL, data={"q": 1})
+        reused = util.client is client and not client.is_closed
+        await util.close()
+        reopened = util._get_client()
+        await util.close()
+        return client, reused, reopened
+
+    client, reused, reopened = asyncio.run(run())
+
+    assert reused
+    assert client.is_closed
+    assert reopened is not client
+    assert sum(calls.values()) == 3
+
+
+def test_open_is_idempotent():
+    util = HttpxUtil(transport=_counting_transport({}))
+
+    async def run():
+        await util.open()
+        first = util.client
+        await util.open()
+        second = util.client
+        await util.close()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert first is second
@@ -0,0 +1,109 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from utils import kmb_util
+from utils.httpx_util import HttpxUtil
+from utils.kmb_util import KMBRouterUtil
+from models.kmb.router.route_lane import KMBRouterResponse
+
+
+def _run_refresher_briefly(util: KMBRouterUtil) -> int:
+    refreshes = []
+
+    async def refresh_catalog():
+        refreshes.append(True)
+
+    util.refresh_catalog = refresh_catalog
+
+    async def run():
+        task = asyncio.create_task(util.run_catalog_refresher(3600))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    return len(refreshes)
+
+
+def test_refresher_replaces_a_snapshot_catalog_at_once():
+    util = KMBRouterUtil()
+    util._catalog_from_snapshot = True
+
+    assert _run_refresher_briefly(util) == 1
+
+
+def test_refresher_waits_one_interval_after_an_upstream_load():
+    assert _run_refresher_briefly(KMBRouterUtil()) == 0
+
+
+def _lane(route: str, bound: str) -> dict:
+    return {"route": route, "bound": bound, "service_type": "1", "orig_en": "A", "orig_tc": "A", "orig_sc": "A",
+            "dest_en": "B", "dest_tc": "B", "dest_sc": "B"}
+
+
+@pytest.fixture
+def route_stop_api(monkeypatch):
+    """A KMBRouterUtil with route 1A in its catalog but no bulk route-stop data, and a fake route-stop endpoint."""
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        _, route, direction, service_type = request.url.path.rsplit("/", 3)
+        if route != "1A":
+            return httpx.Response(200, json={"type": "RouteStopList", "version": "1.0",
+                                             "generated_timestamp": "", "data": []})
+        bound = "O" if direction == "outbound" else "I"
+        stops = ["S1", "S2"] if bound == "O" else ["S3"]
+        return httpx.Response(200, json={"type": "RouteStopList", "version": "1.0", "generated_timestamp": "", "data": [
+            {"route": route, "bound": bound, "service_type": service_type, "seq": str(seq), "stop": stop}
+            for seq, stop in enumerate(stops, start=1)
+        ]})
+
+    util = KMBRouterUtil()
+    util.set_route_cache(KMBRouterResponse(type="RouteList", version="1.0", generated_timestamp="", data=[
+        _lane("1A", "O"), _lane("1A", "I"), _lane("2", "O"),
+    ]))
+    httpx_util = HttpxUtil(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(kmb_util, "get_global_kmb_util", lambda: util)
+    monkeypatch.setattr(kmb_util, "get_global_httpx_util", lambda: httpx_util)
+    return util, requests
+
+
+def test_filter_fetches_route_stops_missing_from_bulk_data(route_stop_api):
+    util, requests = route_stop_api
+    stops = [SimpleNamespace(stop=stop_id) for stop_id in ("S1", "S3", "S9")]
+
+    async def run():
+        return [await KMBRouterUtil.filter_stops_by_route(stops, "1a") for _ in range(2)]
+
+    first, second = asyncio.run(run())
+
+    assert [stop.stop for stop in first] == ["S1", "S3"]
+    assert second == first
+    assert sorted(requests) == [
+        "/v1/transport/kmb/route-stop/1A/inbound/1",
+        "/v1/transport/kmb/route-stop/1A/outbound/1",
+    ]
+    assert util.get_route_stop_index().stops_for_route("1A", "O", "1") == ["S1", "S2"]
+
+
+def test_route_without_stops_upstream_is_not_refetched(route_stop_api):
+    _, requests = route_stop_api
+    stops = [SimpleNamespace(stop="S1")]
+
+    async def run():
+        return [await KMBRouterUtil.filter_stops_by_route(stops, "2") for _ in range(3)]
+
+    assert all(result == stops for result in asyncio.run(run()))
+    assert requests == ["/v1/transport/kmb/route-stop/2/outbound/1"]
+
+
+def test_unknown_route_keeps_every_stop_without_a_request(route_stop_api):
+    _, requests = route_stop_api
+    stops = [SimpleNamespace(stop="S1")]
+
+    assert asyncio.run(KMBRouterUtil.filter_stops_by_route(stops, "999X")) == stops
+    assert not requests
@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from utils.metrics_util import StageMetrics
+
+
+def _series(metrics: StageMetrics, name: str) -> dict[str, float]:
+    lines = [line for line in metrics.render().splitlines() if line.startswith(f"{metrics.prefix}_{name}")]
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1]) for line in lines}
+
+
+def test_timed_counts_calls_and_errors():
+    metrics = StageMetrics(prefix="test")
+
+    @metrics.timed("fetch")
+    async def fetch(fail: bool):
+        if fail:
+            raise ValueError("upstream down")
+        return "ok"
+
+    async def run():
+        assert await fetch(False) == "ok"
+        with pytest.raises(ValueError):
+            await fetch(True)
+
+    asyncio.run(run())
+
+    assert _series(metrics, "stage_latency_seconds_count")['test_stage_latency_seconds_count{stage="fetch"}'] == 2
+    assert _series(metrics, "stage_errors_total") == {'test_stage_errors_total{stage="fetch"}': 1}
+    assert not _series(metrics, "stage_cancelled_total")
+
+
+def test_cancelled_calls_are_not_errors():
+    metrics = StageMetrics(prefix="test")
+
+    @metrics.timed("fetch")
+    async def fetch():
+        await asyncio.sleep(10)
+
+    async def run():
+        task = asyncio.create_task(fetch())
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(fetch(), timeout=0.01)
+
+    asyncio.run(run())
+
+    assert not _series(metrics, "stage_errors_total")
+    assert not _series(metrics, "stage_latency_seconds_count")
+    assert _series(metrics, "stage_cancelled_total") == {'test_stage_cancelled_total{stage="fetch"}': 2}
+
+
+def test_stage_timer_context_manager():
+    metrics = StageMetrics(prefix="test")
+
+    with metrics.timer("query"):
+        pass
+    with pytest.raises(KeyError):
+        with metrics.timer("query"):
+            raise KeyError("missing")
+
+    assert _series(metrics, "stage_latency_seconds_count")['test_stage_latency_seconds_count{stage="query"}'] == 2
+    assert _series(metrics, "stage_errors_total") == {'test_stage_errors_total{stage="query"}': 1}
+
+
+def test_disabled_metrics_leave_functions_undecorated():
+    metrics = StageMetrics(enabled=False, prefix="test")
+
+    async def fetch():
+        return 1
+
+    assert metrics.timed("fetch")(fetch) is fetch
+    with metrics.timer("query"):
+        pass
+    assert not _series(metrics, "stage_latency_seconds_count")
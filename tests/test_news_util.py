@@ -0,0 +1,176 @@
+import asyncio
+
+import httpx
+import pytest
+
+from utils import news_util
+from utils.httpx_util import HttpxUtil
+from utils.news_util import NewsUtil
+
+NEWS_URL = "https://newsapi.example/v2/everything"
+
+ARTICLE = {
+    "source": {"name": "Example Wire"},
+    "title": "MTR and KMB extend late night services",
+    "description": "Both operators will run extra departures after midnight on weekends.",
+    "publishedAt": "2026-10-17T01:00:00Z",
+}
+
+
+class FakeNewsApi:
+    """Serves queued (status, payload) replies in order and records each request."""
+
+    def __init__(self, *replies: tuple[int, dict]):
+        self.replies = list(replies)
+        self.requests: list[httpx.Request] = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        status, payload = self.replies.pop(0) if len(self.replies) > 1 else self.replies[0]
+        return httpx.Response(status, json=payload)
+
+
+def _ok(*articles) -> tuple[int, dict]:
+    return 200, {"status": "ok", "totalResults": len(articles), "articles": list(articles)}
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    def install(*replies):
+        api = FakeNewsApi(*replies)
+        httpx_util = HttpxUtil(transport=httpx.MockTransport(api.handler))
+        monkeypatch.setattr(news_util, "get_global_httpx_util", lambda: httpx_util)
+        return api
+    return install
+
+
+def _news(**kwargs) -> NewsUtil:
+    options = {"api_key": "test-key", "daily_quota": 100, "cache_ttl": 900, "cache_stale_ttl": 2700, "url": NEWS_URL}
+    options.update(kwargs)
+    return NewsUtil(**options)
+
+
+def test_fresh_result_is_cached_per_keyword(fake_api):
+    api = fake_api(_ok(ARTICLE))
+    news = _news()
+
+    async def run():
+        return await news.get_news_summary("KMB"), await news.get_news_summary(" kmb ")
+
+    first, second = asyncio.run(run())
+
+    assert first == second
+    assert first[0]["title"] == "MTR and KMB extend late night services"
+    assert len(api.requests) == 1
+    assert api.requests[0].headers["X-Api-Key"] == "test-key"
+    assert news.quota.stats()["used"] == 1
+
+
+def test_429_marks_quota_exhausted_and_serves_last_good(fake_api):
+    api = fake_api(_ok(ARTICLE), (429, {"status": "error", "code": "rateLimited", "message": "slow down"}))
+    news = _news(cache_ttl=0, cache_stale_ttl=0)
+
+    async def run():
+        first = await news.get_news_summary("KMB")
+        limited = await news.get_news_summary("KMB")
+        after = await news.get_news_summary("KMB")
+        return first, limited, after
+
+    first, limited, after = asyncio.run(run())
+
+    assert limited == first
+    assert after == first
+    assert news.quota.stats()["exhausted"] is True
+    # Once exhausted, no further requests reach upstream
+    assert len(api.requests) == 2
+
+
+def test_api_key_exhausted_code_counts_as_quota_exhaustion(fake_api):
+    api = fake_api((200, {"status": "error", "code": "apiKeyExhausted", "message": "no more requests"}))
+    news = _news()
+
+    result = asyncio.run(news.get_news_summary("weather"))
+
+    assert result == []
+    assert news.quota.stats()["exhausted"] is True
+    assert len(api.requests) == 1
+
+
+def test_daily_limit_stops_upstream_calls(fake_api):
+    api = fake_api(_ok(ARTICLE))
+    news = _news(daily_quota=1)
+
+    async def run():
+        return await news.get_news_summary("KMB"), await news.get_news_summary("MTR")
+
+    kmb, mtr = asyncio.run(run())
+
+    assert kmb
+    assert mtr == []
+    assert len(api.requests) == 1
+    assert news.quota.stats()["used"] == 1
+    assert news.quota.stats()["exhausted"] is True
+
+
+def test_server_error_serves_last_good_and_retries(fake_api):
+    api = fake_api(_ok(ARTICLE), (503, {"status": "error", "message": "unavailable"}), _ok())
+    news = _news(cache_ttl=0, cache_stale_ttl=0)
+
+    async def run():
+        first = await news.get_news_summary("KMB")
+        failed = await news.get_news_summary("KMB")
+        recovered = await news.get_news_summary("KMB")
+        return first, failed, recovered
+
+    first, failed, recovered = asyncio.run(run())
+
+    assert failed == first
+    assert news.quota.stats()["exhausted"] is False
+    # A 5xx is not cached, so the next call goes upstream again and takes the new (empty) result
+    assert recovered == []
+    assert len(api.requests) == 3
+
+
+def test_stale_entry_is_served_while_refreshing(fake_api):
+    newer = {**ARTICLE, "title": "KMB adds route 101X"}
+    fake_api(_ok(ARTICLE), _ok(newer))
+    news = _news(cache_ttl=0, cache_stale_ttl=60)
+
+    async def run():
+        first = await news.get_news_summary("KMB")
+        stale = await news.get_news_summary("KMB")
+        # Let the background refresh finish
+        await asyncio.sleep(0.05)
+        refreshed = await news.get_news_summary("KMB")
+        return first, stale, refreshed
+
+    first, stale, refreshed = asyncio.run(run())
+
+    assert stale == first
+    assert refreshed[0]["title"] == "KMB adds route 101X"
+    assert news.stats()["cache"]["stale_hits"] >= 2
+
+
+def test_failed_refresh_keeps_serving_stale_entry(fake_api):
+    api = fake_api(_ok(ARTICLE), (500, {"status": "error", "message": "boom"}))
+    news = _news(cache_ttl=0, cache_stale_ttl=60)
+
+    async def run():
+        first = await news.get_news_summary("KMB")
+        stale = await news.get_news_summary("KMB")
+        await asyncio.sleep(0.05)
+        still_stale = await news.get_news_summary("KMB")
+        return first, stale, still_stale
+
+    first, stale, still_stale = asyncio.run(run())
+
+    assert stale == first
+    assert still_stale == first
+    assert len(api.requests) >= 2
+
+
+def test_missing_api_key_makes_no_request(fake_api):
+    api = fake_api(_ok(ARTICLE))
+
+    assert asyncio.run(_news(api_key="").get_news_summary("KMB")) == []
+    assert not api.requests